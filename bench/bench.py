@@ -0,0 +1,211 @@
+"""
+Benchmarks for the parser and the full build, written to JSON so runs on
+different commits can be compared.
+
+    python3 bench/bench.py                       # micro + publish at 1k/10k/100k pages
+    python3 bench/bench.py --suite micro
+    python3 bench/bench.py --pages 1000 --jobs 4 -o before.json
+
+Generated sites and build output live in bench/_work/, inside the project,
+because publish() refuses to clean directories outside of it. Sites are
+generated once per set of parameters and reused by later runs.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from main import PROJECT_ROOT, clean_dir, generate_page, publish
+from md_handler import lex_blocks, markdown_to_blocks, markdown_to_html_node, render_many, text_to_textnodes
+from sitegen import generate_site, generate_static, make_page
+
+WORK_DIR = os.path.join(BENCH_DIR, "_work")
+TEMPLATE_FILE = os.path.join(PROJECT_ROOT, "template.html")
+
+def time_runs(run: Callable[[], object], ops: int, repeat: int) -> dict:
+    # Best of several runs is the least noisy estimate; the median shows the spread
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    best = min(times)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "best_s": best,
+        "median_s": statistics.median(times),
+        "per_op_us": best / ops * 1e6,
+    }
+
+def run_micro(pages: int, paragraphs: int, density: float, seed: int, repeat: int) -> dict:
+    documents = [make_page(index, paragraphs, density, seed) for index in range(pages)]
+    inline_texts = [" ".join(block.lines) for document in documents for block in lex_blocks(document) if not block.lines[0].startswith("```")]
+    trees = [markdown_to_html_node(document) for document in documents]
+
+    page_dir = os.path.join(WORK_DIR, "micro")
+    os.makedirs(page_dir, exist_ok=True)
+    page_files = []
+    for index, document in enumerate(documents):
+        input_file = os.path.join(page_dir, f"page-{index}.md")
+        with open(input_file, "w", encoding="utf8") as file:
+            file.write(document)
+        page_files.append((input_file, os.path.join(page_dir, f"page-{index}.html")))
+
+    def generate_pages() -> None:
+        for input_file, output_file in page_files:
+            generate_page(input_file, TEMPLATE_FILE, output_file, "/")
+
+    results = {
+        "text_to_textnodes": time_runs(lambda: [text_to_textnodes(text) for text in inline_texts], len(inline_texts), repeat),
+        "markdown_to_blocks": time_runs(lambda: [markdown_to_blocks(document) for document in documents], pages, repeat),
+        "markdown_to_html_node": time_runs(lambda: [markdown_to_html_node(document) for document in documents], pages, repeat),
+        "to_html": time_runs(lambda: [tree.to_html() for tree in trees], pages, repeat),
+        "render_many": time_runs(lambda: list(render_many(documents)), pages, repeat),
+        "generate_page": time_runs(generate_pages, pages, repeat),
+    }
+    clean_dir(page_dir)
+    return results
+
+def ensure_site(pages: int, paragraphs: int, density: float, seed: int, boilerplate: float) -> tuple[str, str]:
+    site_dir = os.path.join(WORK_DIR, f"site-{pages}-{paragraphs}-{density}-{seed}-{boilerplate}")
+    content_dir = os.path.join(site_dir, "content")
+    static_dir = os.path.join(site_dir, "static")
+    marker = os.path.join(site_dir, ".complete")
+    if not os.path.exists(marker):
+        # A half-written site from an interrupted run is thrown away, not reused
+        clean_dir(site_dir)
+        print(f"Generating {pages} pages in {site_dir}...")
+        generate_site(content_dir, pages, paragraphs, density, seed, boilerplate)
+        generate_static(static_dir, seed=seed)
+        open(marker, "w").close()
+    return content_dir, static_dir
+
+def run_publish(page_counts: List[int], paragraphs: int, density: float, seed: int, boilerplate: float, jobs: int, fragment_cache: int) -> dict:
+    results = {}
+    for pages in page_counts:
+        content_dir, static_dir = ensure_site(pages, paragraphs, density, seed, boilerplate)
+        output_dir = os.path.join(WORK_DIR, f"out-{pages}")
+        clean_dir(output_dir)
+
+        started = time.perf_counter()
+        report = publish(content_dir, static_dir, output_dir, "/", jobs=jobs, fragment_cache=fragment_cache)
+        full = time.perf_counter() - started
+        # A rebuild with nothing to do measures the fixed cost of checking every page
+        started = time.perf_counter()
+        publish(content_dir, static_dir, output_dir, "/", incremental=True, jobs=jobs, fragment_cache=fragment_cache)
+        noop = time.perf_counter() - started
+
+        clean_dir(output_dir)
+        results[str(pages)] = {
+            "pages": pages,
+            "full_s": full,
+            "pages_per_s": pages / full,
+            "incremental_noop_s": noop,
+            "report": {key: dict(value) if isinstance(value, dict) else value for key, value in report.items()},
+        }
+        print(f"publish {pages:>7} pages: {full:8.2f} s ({pages / full:8.1f} pages/s), no-op rebuild {noop:.2f} s")
+    return results
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the static site generator')
+    parser.add_argument(
+        '--suite',
+        choices=("all", "micro", "publish"),
+        default="all",
+        help='which benchmarks to run')
+    parser.add_argument(
+        '--pages',
+        default="1000,10000,100000",
+        help='comma separated page counts for the publish benchmark')
+    parser.add_argument(
+        '--micro-pages',
+        type=int,
+        default=200,
+        help='number of pages the micro-benchmarks run over')
+    parser.add_argument(
+        '--paragraphs',
+        type=int,
+        default=20,
+        help='blocks per generated page')
+    parser.add_argument(
+        '--density',
+        type=float,
+        default=0.2,
+        help='share of words with inline markup and of blocks that are not paragraphs (0-1)')
+    parser.add_argument(
+        '--boilerplate',
+        type=float,
+        default=0.0,
+        help='share of blocks copied from a pool shared by all pages (0-1)')
+    parser.add_argument(
+        '--fragment-cache',
+        type=int,
+        default=0,
+        help='fragment cache size for the publish benchmark (0 disables it)')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='seed for the content generator')
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='number of pages publish renders in parallel (0 uses every CPU core)')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='runs per micro-benchmark')
+    parser.add_argument(
+        '--output', '-o',
+        default=os.path.join(BENCH_DIR, "results.json"),
+        help='where to write the JSON results')
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "paragraphs": args.paragraphs, "density": args.density, "seed": args.seed,
+                "boilerplate": args.boilerplate, "fragment_cache": args.fragment_cache,
+                "jobs": jobs, "repeat": args.repeat, "micro_pages": args.micro_pages,
+            },
+        },
+    }
+    if args.suite in ("all", "micro"):
+        results["micro"] = run_micro(args.micro_pages, args.paragraphs, args.density, args.seed, args.repeat)
+        for name, result in results["micro"].items():
+            print(f"{name:22} {result['per_op_us']:10.1f} us/op (best of {result['repeat']})")
+    if args.suite in ("all", "publish"):
+        page_counts = [int(count) for count in args.pages.split(",") if count]
+        results["publish"] = run_publish(page_counts, args.paragraphs, args.density, args.seed, args.boilerplate, jobs, args.fragment_cache)
+
+    with open(args.output, "w", encoding="utf8") as file:
+        json.dump(results, file, indent=1)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
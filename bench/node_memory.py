@@ -0,0 +1,87 @@
+"""
+Bytes per node for the slotted TextNode/HTMLNode classes, compared to a
+replica of the old dict-backed layout (a __dict__ per instance and a fresh
+{} for every node without props).
+
+Both versions of the tree are built from the same parsed page and share
+their strings and enums, so the difference is only the node overhead.
+
+    python3 bench/node_memory.py [paragraphs]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from leafnode import LeafNode
+from md_handler import lex_blocks, markdown_to_html_node, text_to_textnodes
+from parentnode import ParentNode
+from textnode import TextNode
+from sitegen import make_page
+
+# The dict-backed layout from before the nodes got __slots__
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props or {}
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+def copy_text_nodes(nodes, cls):
+    return [cls(node.text, node.text_type, node.url) for node in nodes]
+
+def copy_tree(node, leaf_cls, parent_cls):
+    if node.children is None:
+        return leaf_cls(node.tag, node.value, dict(node.props) if node.props else None)
+    children = [copy_tree(child, leaf_cls, parent_cls) for child in node.children]
+    return parent_cls(node.tag, children, dict(node.props) if node.props else None)
+
+def count_nodes(node) -> int:
+    if node.children is None:
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main() -> None:
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    markdown = "\n\n".join(make_page(index) for index in range(paragraphs // 20 or 1))
+
+    text_nodes = [node for block in lex_blocks(markdown) for node in text_to_textnodes(" ".join(block.lines))]
+    tree = markdown_to_html_node(markdown)
+    text_count = len(text_nodes)
+    html_count = count_nodes(tree)
+
+    _, dict_text = measure(lambda: copy_text_nodes(text_nodes, DictTextNode))
+    _, slot_text = measure(lambda: copy_text_nodes(text_nodes, TextNode))
+    _, dict_html = measure(lambda: copy_tree(tree, DictLeafNode, DictParentNode))
+    _, slot_html = measure(lambda: copy_tree(tree, LeafNode, ParentNode))
+
+    print(f"page: {len(markdown)} characters, {text_count} text nodes, {html_count} HTML nodes")
+    print(f"{'':10} {'dict':>12} {'slots':>12} {'saved':>8}")
+    for name, count, old, new in (("TextNode", text_count, dict_text, slot_text), ("HTMLNode", html_count, dict_html, slot_html)):
+        print(f"{name:10} {old / count:9.1f} B/n {new / count:9.1f} B/n {1 - new / old:7.1%}")
+
+if __name__ == "__main__":
+    main()
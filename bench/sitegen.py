@@ -0,0 +1,92 @@
+"""
+Deterministic synthetic content for benchmarks. The same arguments always
+produce the same pages, so runs on different commits measure the same input.
+"""
+import os
+import random
+from typing import List
+
+WORDS = [
+    "static", "site", "markdown", "node", "render", "page", "build", "html",
+    "template", "cache", "parser", "block", "inline", "output", "content",
+    "server", "deploy", "theme", "asset", "index", "query", "stream", "link",
+]
+
+# Relative weights of the block kinds after the title; density shifts weight
+# from plain paragraphs to the rest.
+BLOCK_KINDS = ("paragraph", "heading", "unordered", "ordered", "quote", "code")
+
+# Blocks shared between pages (disclaimers, bios, "see also" lists) come from
+# a small pool, the same for every page generated with the same seed
+BOILERPLATE_BLOCKS = 16
+
+def make_page(index: int, paragraphs: int = 20, density: float = 0.2, seed: int = 0, boilerplate: float = 0.0) -> str:
+    """
+    One markdown page with a title and roughly `paragraphs` blocks.
+    `density` (0-1) is both the share of words that carry inline markup
+    (links, images, code spans, bold, italic) and the share of blocks that
+    aren't plain paragraphs (lists, quotes, headings, fenced code).
+    `boilerplate` (0-1) is the share of blocks copied from a pool shared by
+    all pages instead of generated for this one.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    blocks = [f"# Page {index}: {rng.choice(WORDS)} {rng.choice(WORDS)}"]
+    for _ in range(paragraphs):
+        # Only draw when asked to, so sites without boilerplate stay the same
+        if boilerplate and rng.random() < boilerplate:
+            blocks.append(_make_block(random.Random(f"{seed}:shared:{rng.randrange(BOILERPLATE_BLOCKS)}"), density))
+        else:
+            blocks.append(_make_block(rng, density))
+    return "\n\n".join(blocks) + "\n"
+
+def _make_block(rng: random.Random, density: float) -> str:
+    weights = (1 - density, density / 5, density / 5, density / 5, density / 5, density / 5)
+    kind = rng.choices(BLOCK_KINDS, weights)[0]
+    match kind:
+        case "paragraph":
+            lines = [_inline(rng, density, 12) for _ in range(rng.randint(1, 4))]
+            return "\n".join(lines)
+        case "heading":
+            return f"{'#' * rng.randint(2, 4)} {_inline(rng, density, 4)}"
+        case "unordered":
+            return "\n".join(f"- {_inline(rng, density, 6)}" for _ in range(rng.randint(2, 6)))
+        case "ordered":
+            return "\n".join(f"{i}. {_inline(rng, density, 6)}" for i in range(1, rng.randint(2, 6) + 1))
+        case "quote":
+            return "\n".join(f"> {_inline(rng, density, 10)}" for _ in range(rng.randint(1, 3)))
+        case "code":
+            lines = [f"    {rng.choice(WORDS)}({rng.choice(WORDS)}, {rng.randint(0, 99)})" for _ in range(rng.randint(2, 8))]
+            # Fenced code may contain blank lines
+            lines.insert(rng.randint(0, len(lines)), "")
+            return "```\ndef " + rng.choice(WORDS) + "():\n" + "\n".join(lines) + "\n```"
+
+def _inline(rng: random.Random, density: float, words: int) -> str:
+    out: List[str] = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < density:
+            match rng.randrange(5):
+                case 0: word = f"[{word}](/{rng.choice(WORDS)}/{rng.randint(0, 999)}.html)"
+                case 1: word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+                case 2: word = f"`{word}()`"
+                case 3: word = f"**{word}**"
+                case 4: word = f"_{word}_"
+        out.append(word)
+    return " ".join(out)
+
+def generate_site(content_dir: str, pages: int, paragraphs: int = 20, density: float = 0.2, seed: int = 0, boilerplate: float = 0.0, pages_per_dir: int = 100) -> None:
+    # Nested like a real site, so directory walking is part of what gets measured
+    for index in range(pages):
+        directory = os.path.join(content_dir, f"section-{index // pages_per_dir:04d}")
+        if index % pages_per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"page-{index:06d}.md"), "w", encoding="utf8") as file:
+            file.write(make_page(index, paragraphs, density, seed, boilerplate))
+
+def generate_static(static_dir: str, files: int = 20, size: int = 64 * 1024, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    for index in range(files):
+        subdir = "images" if index % 2 else ""
+        with open(os.path.join(static_dir, subdir, f"asset-{index:03d}.bin"), "wb") as file:
+            file.write(rng.randbytes(size))
@@ -0,0 +1,60 @@
+import os
+from typing import TextIO
+
+from manifest import hash_file
+
+class OutputFile:
+    """
+    Opens a generated text file for writing, as a context manager.
+
+    By default the file is written in place. With atomic, the content goes to
+    a temporary file next to it instead, which replaces the file on close, so
+    a write that fails part way leaves the previous file untouched. With
+    skip_unchanged (which implies atomic), the replacement only happens if
+    the bytes differ (size first, then content hash). Identical files are left
+    alone, mtime included, so deploy tools that sync by mtime or checksum only
+    pick up what really changed. Either way, a write that fails part way
+    leaves no partial file behind. `changed` tells whether the file was
+    replaced.
+    """
+    def __init__(self, path: str, skip_unchanged: bool = False, buffering: int = -1, atomic: bool = False):
+        self.path = path
+        self.skip_unchanged = skip_unchanged
+        self.buffering = buffering
+        # Same directory as the output, so the rename never crosses filesystems
+        directory, name = os.path.split(path)
+        self.write_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp") if skip_unchanged or atomic else path
+        self.file: TextIO | None = None
+        self.changed = False
+
+    def __enter__(self) -> TextIO:
+        self.file = open(self.write_path, "w", encoding="utf8", buffering=self.buffering)
+        return self.file
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.file.close()
+        if exc_type is not None:
+            try:
+                os.remove(self.write_path)
+            except FileNotFoundError:
+                pass
+            return
+        if not self.skip_unchanged:
+            if self.write_path != self.path:
+                os.replace(self.write_path, self.path)
+            self.changed = True
+        elif same_content(self.write_path, self.path):
+            os.remove(self.write_path)
+        else:
+            os.replace(self.write_path, self.path)
+            self.changed = True
+
+def same_content(new_file: str, old_file: str) -> bool:
+    try:
+        old_size = os.path.getsize(old_file)
+    except FileNotFoundError:
+        return False
+    # Sizes are free to compare and settle most changes without reading anything
+    if os.path.getsize(new_file) != old_size:
+        return False
+    return hash_file(new_file) == hash_file(old_file)
@@ -0,0 +1,111 @@
+import errno
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Linux ioctl that shares the source's extents with the destination (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Large chunks keep the number of syscalls down for multi-GB media
+CHUNK_SIZE = 64 * 1024 * 1024
+
+STRATEGIES = ("auto", "reflink", "hardlink", "copy_file_range", "sendfile", "copy")
+
+# Tried in order by "auto"; hardlinks are never picked automatically because
+# they make the output share its inode with the source tree.
+AUTO_ORDER = ("reflink", "copy_file_range", "sendfile")
+
+# Errors that mean "this primitive doesn't work here", not "the copy failed"
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP,
+    errno.ENOTTY, errno.EBADF, errno.EPERM, errno.EMLINK,
+}
+
+def copy_file(src: str, dst: str, strategy: str = "auto") -> str:
+    """
+    Copies src to dst, preserving metadata like shutil.copy2, and returns the
+    name of the strategy that actually did the copy. Strategies that are not
+    supported by the platform or filesystem fall back to the next one, ending
+    with a plain shutil.copy2 ("copy").
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown copy strategy '{strategy}'")
+
+    # Replace rather than overwrite, so we never write through an existing
+    # hardlink into the source tree.
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+
+    if strategy == "copy":
+        candidates = ()
+    elif strategy == "hardlink":
+        candidates = ("hardlink",) + AUTO_ORDER
+    elif strategy == "auto":
+        candidates = AUTO_ORDER
+    else:
+        candidates = (strategy,)
+
+    for name in candidates:
+        try:
+            _PRIMITIVES[name](src, dst)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            _discard(dst)
+            continue
+        if name != "hardlink":
+            shutil.copystat(src, dst)
+        return name
+
+    shutil.copy2(src, dst)
+    return "copy"
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _hardlink(src: str, dst: str) -> None:
+    os.link(src, dst)
+
+def _reflink(src: str, dst: str) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks are not supported on this platform")
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+def _kernel_copy(copy_chunk, src: str, dst: str) -> None:
+    # Shared loop for the in-kernel primitives, which may copy less than asked for
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        remaining = os.fstat(source.fileno()).st_size
+        offset = 0
+        while remaining > 0:
+            copied = copy_chunk(source.fileno(), target.fileno(), offset, min(remaining, CHUNK_SIZE))
+            if copied == 0:
+                break
+            offset += copied
+            remaining -= copied
+
+def _copy_file_range(src: str, dst: str) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    _kernel_copy(lambda fd_in, fd_out, offset, count: os.copy_file_range(fd_in, fd_out, count, offset, offset), src, dst)
+
+def _sendfile(src: str, dst: str) -> None:
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile is not available")
+    _kernel_copy(lambda fd_in, fd_out, offset, count: os.sendfile(fd_out, fd_in, offset, count), src, dst)
+
+_PRIMITIVES = {
+    "hardlink": _hardlink,
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+}
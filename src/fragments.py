@@ -0,0 +1,44 @@
+import hashlib
+from collections import OrderedDict
+
+def fragment_key(kind: str, text: str, basepath: str = "/") -> bytes:
+    # Content-addressed, so the cache holds short digests instead of the source text.
+    # Links are rendered below the basepath, so it is part of the key too.
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(kind.encode("utf8"))
+    digest.update(b"\0")
+    digest.update(basepath.encode("utf8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf8"))
+    return digest.digest()
+
+class FragmentCache:
+    """
+    A bounded LRU map from fragment keys to rendered fragments. Once full,
+    the least recently used fragment is dropped to make room for a new one.
+    """
+    def __init__(self, max_entries: int):
+        if max_entries < 1:
+            raise ValueError("FragmentCache needs room for at least one entry")
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes) -> object | None:
+        fragment = self.entries.get(key)
+        if fragment is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return fragment
+
+    def put(self, key: bytes, fragment: object) -> None:
+        self.entries[key] = fragment
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
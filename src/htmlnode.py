@@ -1,17 +1,41 @@
 
-from typing import List, Self
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, Self, TextIO
 
+# Shared by every node without props, instead of a fresh {} per node.
+# Read-only, so one node can't leak props into all the others.
+EMPTY_PROPS: Mapping[str, str] = MappingProxyType({})
 
 class HTMLNode:
+    # No per-instance __dict__; a large page creates tens of thousands of nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: List[Self] = None, props: dict = None):
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props or {}
+        self.props = props or EMPTY_PROPS
     
+    def __getstate__(self) -> tuple:
+        # A mappingproxy can't be pickled or deep-copied; the shared empty
+        # props travel as None and become EMPTY_PROPS again on the way back
+        return (self.tag, self.value, self.children, None if self.props is EMPTY_PROPS else self.props)
+
+    def __setstate__(self, state: tuple) -> None:
+        self.tag, self.value, self.children, props = state
+        self.props = EMPTY_PROPS if props is None else props
+
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self) -> Iterator[str]:
+        # Subclasses with children override this to stream them instead of joining
+        yield self.to_html()
+
+    def write_html(self, file: TextIO) -> None:
+        # Streams the serialized node into file without building the whole string
+        file.writelines(self.iter_html())
+
     def props_to_html(self) -> str:
         if not self.props:
             return ""
@@ -19,4 +43,4 @@ class HTMLNode:
         return " " + " ".join(f'{key}="{value}"' for key, value in self.props.items())
     
     def __repr__(self) -> str:
-        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
\ No newline at end of file
+        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {dict(self.props)})"
\ No newline at end of file
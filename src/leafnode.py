@@ -1,4 +1,5 @@
-from htmlnode import HTMLNode
+from typing import Mapping, Self
+from htmlnode import EMPTY_PROPS, HTMLNode
 
 # These tags are void elements in HTML, meaning they do not have inner content (`value`)
 # and must rely on attributes like `src` (for `<img>`) or their mere presence (like `<hr>`, `<br>`).
@@ -11,6 +12,8 @@ MD_REQUIRED_PROPERTIES = {
 }
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props: dict = None):
         super().__init__(tag, value, None, props)
         # Only apply validation to relevant tags
@@ -23,6 +26,21 @@ class LeafNode(HTMLNode):
         if not self.value and self.tag not in ALLOWED_EMPTY_VALUE_TAGS:
             raise ValueError(f"'{self.tag}' cannot have an empty value.")
 
+    @classmethod
+    def trusted(cls, tag: str, value: str, props: Mapping[str, str] = EMPTY_PROPS) -> Self:
+        """
+        Builds a node without the required-props check, for trees the parser
+        generates and therefore knows are well-formed. The empty value check
+        stays, since markdown like `****` really does produce an empty <b>.
+        """
+        if not value and tag not in ALLOWED_EMPTY_VALUE_TAGS:
+            raise ValueError(f"'{tag}' cannot have an empty value.")
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.value = value
+        node.children = None
+        node.props = props
+        return node
     
     def to_html(self) -> str:
         if self.tag is None:
@@ -1,10 +1,29 @@
+import mmap
 import re
 import shutil
+import sys
+import time
 import traceback
 from textnode import *
 import argparse
 import os
-from md_handler import extract_title, markdown_to_html_node
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import repeat
+from typing import Iterator, List, NamedTuple
+from md_handler import block_to_html_node, collect_terms, configure_fragment_cache, extract_title, fragment_cache_stats, iter_blocks_html, lex_blocks, lex_lines, parse_markdown, title_from_lines
+from fastcopy import STRATEGIES, copy_file
+from watch import Watcher
+from template import load_template
+from manifest import MANIFEST_NAME, BuildManifest, hash_file, page_inputs_hash
+from parentnode import ParentNode
+from profiler import BuildProfile, print_profile, timed
+from rendercache import CACHE_DIR_NAME, DEFAULT_MAX_BYTES, RenderCache
+from atomicwrite import OutputFile
+from pipeline import run_pipeline
+from searchindex import SearchIndex, page_url, remove_index
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
@@ -12,11 +31,275 @@ PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
 PUBLIC_DIR = os.path.join(PROJECT_ROOT, "docs")
 STATIC_DIR = os.path.join(PROJECT_ROOT, "static")
 CONTENT_DIR = os.path.join(PROJECT_ROOT, "content")
+RENDER_CACHE_DIR = os.path.join(PROJECT_ROOT, CACHE_DIR_NAME)
 
-def publish(content_dir: str, static_dir: str, output_dir: str, basepath: str, debug: bool = False) -> None:
-    clean_dir(output_dir, debug)
-    copy_files(static_dir, output_dir, debug)
-    generate_pages_recursive(content_dir, PROJECT_ROOT, output_dir, basepath, debug)
+# Pages are streamed out in many small chunks, so give the writer a roomy buffer
+OUTPUT_BUFFER_SIZE = 256 * 1024
+
+# Default number of blocks the fragment cache keeps; list items get a quarter of that
+FRAGMENT_CACHE_SIZE = 4096
+
+# Default number of files the pipeline reads and writes at once
+PIPELINE_IO_WORKERS = 8
+
+class PageResult(NamedTuple):
+    input_file: str
+    output_file: str
+    # None on success, otherwise "ExceptionType: message"
+    error: str | None
+    # Seconds per page stage when profiling
+    timings: dict | None
+    # Fragment cache hits and misses while rendering this page, when caching
+    cache_stats: dict | None
+    # Whether the body came from the render cache, or None without one
+    render_cached: bool | None
+    # Whether the output file was (re)written, or None if rendering failed
+    changed: bool | None
+    # The page title and its sorted search terms, when building a search index
+    title: str | None
+    terms: List[str] | None
+
+class PageWrite(NamedTuple):
+    # Whether the body came from the render cache, or None without one
+    render_cached: bool | None
+    # False when the output already had exactly these bytes and was left alone
+    changed: bool
+    title: str
+    # Sorted search terms of the page, or None if they weren't collected
+    terms: List[str] | None = None
+
+class RenderOptions(NamedTuple):
+    """
+    How every page of a build is rendered and written. Passed around as one
+    value, down to the pool workers, rather than as a row of flags.
+    """
+    debug: bool = False
+    # Time each page stage for the build profile
+    profile: bool = False
+    mapped: bool = False
+    # Blocks the fragment cache keeps per process, 0 for none
+    fragment_cache: int = 0
+    render_cache: RenderCache | None = None
+    keep_unchanged: bool = False
+    search_index: bool = False
+
+def publish(content_dir: str, static_dir: str, output_dir: str, basepath: str = "/", *, debug: bool = False, incremental: bool = False, jobs: int = 1, checksum: bool = False, copy_strategy: str = "auto", profile: BuildProfile = None, mapped: bool = False, fragment_cache: int = 0, render_cache: RenderCache = None, keep_unchanged: bool = False, pipeline: int = 0, search_index: bool = False) -> dict:
+    if pipeline and (mapped or profile is not None):
+        raise ValueError("The pipeline can't be combined with memory-mapped or profiled rendering")
+    started = time.perf_counter()
+    stage = profile.stage if profile is not None else (lambda name: nullcontext())
+    report = {"rendered": 0, "skipped": 0, "removed": 0, "failed": 0}
+    if incremental or keep_unchanged:
+        # Identical files are kept rather than wiped, so the previous build's
+        # manifest is needed to tell which of them have gone stale
+        previous = BuildManifest.load(output_dir)
+    else:
+        with stage("clean"):
+            clean_dir(output_dir, debug)
+        previous = BuildManifest()
+    manifest = BuildManifest()
+    search = None
+    if search_index:
+        # Only an incremental build keeps pages it doesn't render, and with them their postings
+        search = SearchIndex.load(output_dir) if incremental else SearchIndex()
+    # Cleaned away or never built; the manifest goes there even if nothing else does
+    os.makedirs(output_dir, exist_ok=True)
+    with stage("static copy"):
+        report.update(sync_files(static_dir, output_dir, previous, manifest, checksum, copy_strategy, debug))
+
+    template_file = os.path.join(PROJECT_ROOT, "template.html")
+    template_hash = hash_file(template_file)
+    pending = {}
+    with stage("scan"):
+        for input_file, output_file in collect_pages(content_dir, output_dir):
+            output_key = os.path.relpath(output_file, output_dir)
+            source_key = os.path.relpath(input_file, content_dir)
+            markdown_hash = previous.markdown_hash(output_key, input_file)
+            inputs_hash = page_inputs_hash(markdown_hash, template_hash, basepath)
+            # A page missing from the search index is rendered again to get its terms
+            indexed = search is None or output_key in search.pages
+            if incremental and indexed and previous.is_current(output_key, inputs_hash) and os.path.exists(output_file):
+                if debug: print(f"Skipping unchanged {input_file}")
+                manifest.record(output_key, input_file, source_key, markdown_hash, inputs_hash)
+                report["skipped"] += 1
+            else:
+                pending[output_file] = (input_file, output_key, source_key, markdown_hash, inputs_hash)
+
+    tasks = [(entry[0], output_file) for output_file, entry in pending.items()]
+    failures = []
+    profiler = profile.profiler if profile is not None else None
+    if profiler is not None:
+        # cProfile only sees this process, so the pages have to be rendered here
+        jobs = 1
+        profiler.enable()
+    if fragment_cache:
+        report["fragment_cache"] = Counter()
+    if render_cache is not None:
+        report["render_cache"] = Counter(hits=0, misses=0, pruned=0)
+    if keep_unchanged:
+        report["identical"] = 0
+    options = RenderOptions(debug=debug, profile=profile is not None, mapped=mapped, fragment_cache=fragment_cache, render_cache=render_cache, keep_unchanged=keep_unchanged, search_index=search_index)
+    if pipeline:
+        results, report["pipeline"] = render_pages_pipelined(tasks, template_file, basepath, options, jobs, pipeline)
+    else:
+        results = render_pages(tasks, template_file, basepath, options, jobs)
+    for input_file, output_file, error, timings, cache_stats, render_cached, changed, title, terms in results:
+        if cache_stats is not None:
+            report["fragment_cache"].update(cache_stats)
+        if render_cached is not None:
+            report["render_cache"]["hits" if render_cached else "misses"] += 1
+        input_file, output_key, source_key, markdown_hash, inputs_hash = pending[output_file]
+        if timings is not None:
+            output_size = os.path.getsize(output_file) if error is None else 0
+            profile.add_page(input_file, os.path.getsize(input_file), output_size, timings)
+        if error is None:
+            manifest.record(output_key, input_file, source_key, markdown_hash, inputs_hash)
+            report["rendered"] += 1
+            if keep_unchanged and not changed:
+                report["identical"] += 1
+            if search is not None:
+                search.add(output_key, title, page_url(basepath, output_key), terms)
+            continue
+        print(f"Failed to render {input_file}: {error}")
+        failures.append(input_file)
+        # Keep the old entry so the previous output survives and is retried next build
+        if output_key in previous.pages:
+            manifest.pages[output_key] = previous.pages[output_key]
+    if profiler is not None:
+        profiler.disable()
+        profile.save_stats()
+    if render_cache is not None:
+        report["render_cache"]["pruned"] = render_cache.prune()
+
+    for output_key in previous.stale_outputs(manifest.pages):
+        remove_output(output_dir, output_key, debug)
+        report["removed"] += 1
+        if search is not None:
+            search.remove(output_key)
+    index_files = []
+    if search is not None:
+        saved = search.save(output_dir)
+        index_files = saved["files"]
+        report["search_index"] = {"pages": len(search.pages), "shards_written": saved["shards_written"]}
+    elif report["rendered"] or report["removed"]:
+        remove_index(output_dir)
+    if keep_unchanged and not incremental:
+        # Stands in for the clean step: whatever this build didn't produce goes
+        report["removed"] += remove_untracked(output_dir, manifest, debug, index_files)
+    manifest.save(output_dir)
+    if profile is not None:
+        profile.wall = time.perf_counter() - started
+
+    report["failed"] = len(failures)
+    if failures:
+        raise RuntimeError(f"Failed to render {len(failures)} page(s): {', '.join(failures)}")
+    return report
+
+def watch(content_dir: str, static_dir: str, output_dir: str, basepath: str = "/", *, debug: bool = False, jobs: int = 1, checksum: bool = False, copy_strategy: str = "auto", mapped: bool = False, fragment_cache: int = 0, render_cache: RenderCache = None, keep_unchanged: bool = False, search_index: bool = False) -> None:
+    # Bring the output up to date once, then only touch what changes
+    options = {"debug": debug, "mapped": mapped, "fragment_cache": fragment_cache, "render_cache": render_cache, "keep_unchanged": keep_unchanged, "search_index": search_index}
+    try:
+        print_report(publish(content_dir, static_dir, output_dir, basepath, incremental=True, jobs=jobs, checksum=checksum, copy_strategy=copy_strategy, **options))
+    except RuntimeError as e:
+        # Broken pages are what watch mode is for; they get rebuilt once they're saved again
+        print(e)
+    template_file = os.path.join(PROJECT_ROOT, "template.html")
+    watcher = Watcher([content_dir, static_dir, template_file])
+    print(f"Watching {content_dir}, {static_dir} and {template_file} for changes...")
+    while True:
+        changed, removed = watcher.wait_for_changes()
+        started = time.perf_counter()
+        if template_file in changed:
+            # Every page depends on the template; the manifest sees the new template hash
+            try:
+                report = publish(content_dir, static_dir, output_dir, basepath, incremental=True, jobs=jobs, checksum=checksum, copy_strategy=copy_strategy, **options)
+            except RuntimeError as e:
+                print(e)
+                continue
+        else:
+            report = rebuild_changes(changed, removed, content_dir, static_dir, output_dir, basepath, copy_strategy=copy_strategy, **options)
+        print_report(report)
+        print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+def rebuild_changes(changed: set, removed: set, content_dir: str, static_dir: str, output_dir: str, basepath: str = "/", *, debug: bool = False, copy_strategy: str = "auto", mapped: bool = False, fragment_cache: int = 0, render_cache: RenderCache = None, keep_unchanged: bool = False, search_index: bool = False) -> dict:
+    """
+    Applies a batch of changed and removed source files to an incrementally
+    built output: only the affected pages are rendered and only the affected
+    static files are copied or deleted. Pages are rendered with the same
+    options as publish, and with search_index their postings are updated.
+    """
+    report = {
+        "rendered": 0, "skipped": 0, "removed": 0, "failed": 0,
+        "static_copied": 0, "static_unchanged": 0, "static_removed": 0, "copy_strategies": Counter(),
+    }
+    if fragment_cache:
+        report["fragment_cache"] = Counter()
+    if render_cache is not None:
+        report["render_cache"] = Counter(hits=0, misses=0, pruned=0)
+    if keep_unchanged:
+        report["identical"] = 0
+    options = RenderOptions(debug=debug, mapped=mapped, fragment_cache=fragment_cache, render_cache=render_cache, keep_unchanged=keep_unchanged, search_index=search_index)
+    manifest = BuildManifest.load(output_dir)
+    search = SearchIndex.load(output_dir) if search_index else None
+    template_file = os.path.join(PROJECT_ROOT, "template.html")
+    template_hash = hash_file(template_file)
+
+    for path in sorted(changed | removed):
+        try:
+            if is_inside(path, static_dir):
+                output_key = os.path.relpath(path, static_dir)
+                if path in removed:
+                    remove_output(output_dir, output_key, debug)
+                    manifest.static.discard(output_key)
+                    report["static_removed"] += 1
+                    continue
+                output_file = os.path.join(output_dir, output_key)
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                report["copy_strategies"][copy_file(path, output_file, copy_strategy)] += 1
+                manifest.static.add(output_key)
+                report["static_copied"] += 1
+            elif is_inside(path, content_dir) and path.endswith(".md"):
+                source_key = os.path.relpath(path, content_dir)
+                output_key = source_key[:-len(".md")] + ".html"
+                if path in removed:
+                    remove_output(output_dir, output_key, debug)
+                    manifest.forget(output_key)
+                    report["removed"] += 1
+                    if search is not None:
+                        search.remove(output_key)
+                    continue
+                output_file = os.path.join(output_dir, output_key)
+                result = render_page_job(path, template_file, output_file, basepath, options)
+                if result.cache_stats is not None:
+                    report["fragment_cache"].update(result.cache_stats)
+                if result.render_cached is not None:
+                    report["render_cache"]["hits" if result.render_cached else "misses"] += 1
+                if result.error is not None:
+                    print(f"Failed to render {path}: {result.error}")
+                    report["failed"] += 1
+                    continue
+                markdown_hash = hash_file(path)
+                manifest.record(output_key, path, source_key, markdown_hash, page_inputs_hash(markdown_hash, template_hash, basepath))
+                report["rendered"] += 1
+                if keep_unchanged and not result.changed:
+                    report["identical"] += 1
+                if search is not None:
+                    search.add(output_key, result.title, page_url(basepath, output_key), result.terms)
+        except OSError as e:
+            # A file can disappear between the watcher seeing it and us reading it
+            print(f"Failed to update {path}: {type(e).__name__}: {e}")
+            report["failed"] += 1
+
+    if search is not None:
+        saved = search.save(output_dir)
+        report["search_index"] = {"pages": len(search.pages), "shards_written": saved["shards_written"]}
+    elif report["rendered"] or report["removed"]:
+        remove_index(output_dir)
+    manifest.save(output_dir)
+    return report
+
+def is_inside(path: str, directory: str) -> bool:
+    return path.startswith(os.path.join(directory, ""))
 
 def clean_dir(dir_to_clean: str, debug: bool = False) -> None:
     if not dir_to_clean.startswith(PROJECT_ROOT):
@@ -31,7 +314,7 @@ def clean_dir(dir_to_clean: str, debug: bool = False) -> None:
         print(f"Could not delete: {e}")
         if debug: traceback.print_exc()
 
-def copy_files(input_dir: str, output_dir: str, debug: bool = False) -> None:
+def copy_files(input_dir: str, output_dir: str, debug: bool = False, strategy: str = "auto") -> None:
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         if debug: print(f"Created output directory: {output_dir}")
@@ -39,50 +322,356 @@ def copy_files(input_dir: str, output_dir: str, debug: bool = False) -> None:
         for entry in entries:
             if entry.is_file():
                 output_file = os.path.join(output_dir, entry.name)
-                if debug: print(f"Copying file: {entry.path} -> {output_file}")
-                shutil.copy2(entry.path, output_file)
+                used = copy_file(entry.path, output_file, strategy)
+                if debug: print(f"Copied file ({used}): {entry.path} -> {output_file}")
             elif entry.is_dir():
                 new_input = os.path.join(input_dir, entry.name)
                 new_output = os.path.join(output_dir, entry.name)
                 if debug: print(f"Entering {new_input}...")
-                copy_files(new_input, new_output, debug)
+                copy_files(new_input, new_output, debug, strategy)
 
-def generate_pages_recursive(input_dir: str, template_path: str, output_dir: str, basepath:str, debug: bool = False) -> None:
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        if debug: print(f"Created output directory: {output_dir}")
+def sync_files(input_dir: str, output_dir: str, previous: BuildManifest, manifest: BuildManifest, checksum: bool = False, strategy: str = "auto", debug: bool = False) -> dict:
+    """
+    Brings the static assets in output_dir in line with input_dir, copying only
+    new or changed files and deleting the ones that were removed from input_dir.
+    Identical files are left untouched. Files count as identical when size and
+    mtime match (copy2 preserves the mtime), or, with checksum, when size and
+    content hash match. Copies go through fastcopy.copy_file with the given
+    strategy; the strategies actually used are counted in the report.
+    """
+    report = {"static_copied": 0, "static_unchanged": 0, "static_removed": 0, "copy_strategies": Counter()}
+    for input_file, output_file in collect_files(input_dir, output_dir):
+        output_key = os.path.relpath(output_file, output_dir)
+        if is_same_file(input_file, output_file, checksum):
+            report["static_unchanged"] += 1
+        else:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            used = copy_file(input_file, output_file, strategy)
+            if debug: print(f"Copied file ({used}): {input_file} -> {output_file}")
+            report["copy_strategies"][used] += 1
+            report["static_copied"] += 1
+        manifest.static.add(output_key)
 
-    template_file = os.path.join(template_path, "template.html")
+    for output_key in previous.stale_static(manifest.static):
+        remove_output(output_dir, output_key, debug)
+        report["static_removed"] += 1
+    return report
+
+def is_same_file(input_file: str, output_file: str, checksum: bool = False) -> bool:
+    try:
+        output_stat = os.stat(output_file)
+    except FileNotFoundError:
+        return False
+    input_stat = os.stat(input_file)
+    if input_stat.st_size != output_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(input_file) == hash_file(output_file)
+    return input_stat.st_mtime_ns == output_stat.st_mtime_ns
+
+def collect_files(input_dir: str, output_dir: str) -> List[tuple[str, str]]:
+    files = []
     with os.scandir(input_dir) as entries:
         for entry in entries:
             if entry.is_file():
-                output_file = os.path.join(output_dir, entry.name.replace(r'.md', r'.html'))
-                generate_page(entry.path, template_file, output_file, basepath, debug)
+                files.append((entry.path, os.path.join(output_dir, entry.name)))
+            elif entry.is_dir():
+                files.extend(collect_files(entry.path, os.path.join(output_dir, entry.name)))
+    return files
+
+def collect_pages(input_dir: str, output_dir: str) -> List[tuple[str, str]]:
+    # Every markdown file under input_dir, paired with the HTML file it renders to
+    pages = []
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".md"):
+                output_file = os.path.join(output_dir, entry.name[:-len(".md")] + ".html")
+                pages.append((entry.path, output_file))
             elif entry.is_dir():
                 new_input = os.path.join(input_dir, entry.name)
                 new_output = os.path.join(output_dir, entry.name)
-                if debug: print(f"Entering {new_input}...")
-                generate_pages_recursive(new_input, template_path, new_output, basepath, debug)
+                pages.extend(collect_pages(new_input, new_output))
+    return pages
+
+def remove_untracked(output_dir: str, manifest: BuildManifest, debug: bool = False, keep: List[str] = ()) -> int:
+    # Deletes every file under output_dir that manifest doesn't list (or keep
+    # asks for), and returns how many
+    tracked = set(manifest.pages) | manifest.static | {MANIFEST_NAME} | set(keep)
+    untracked = []
+    for directory, _, files in os.walk(output_dir):
+        for name in files:
+            output_key = os.path.relpath(os.path.join(directory, name), output_dir)
+            if output_key not in tracked:
+                untracked.append(output_key)
+    for output_key in untracked:
+        remove_output(output_dir, output_key, debug)
+    return len(untracked)
+
+def remove_output(output_dir: str, output_key: str, debug: bool = False) -> None:
+    output_file = os.path.join(output_dir, output_key)
+    if debug: print(f"Removing stale output {output_file}")
+    try:
+        os.remove(output_file)
+    except FileNotFoundError:
+        pass
+    # Drop directories the removal left empty, but never the output root itself
+    parent = os.path.dirname(output_file)
+    while parent != output_dir and parent.startswith(output_dir):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+def render_pages(tasks: List[tuple[str, str]], template_file: str, basepath: str, options: RenderOptions = RenderOptions(), jobs: int = 1) -> Iterator[PageResult]:
+    """
+    Renders (input_file, output_file) pairs and yields a PageResult for each.
+    With jobs > 1 pages are rendered in a process pool; workers write their
+    output themselves and only send back these small tuples, never the
+    rendered HTML.
+    """
+    if jobs == 1 or len(tasks) < 2:
+        for input_file, output_file in tasks:
+            yield render_page_job(input_file, template_file, output_file, basepath, options)
+        return
+
+    # Hand out several pages per round trip, but keep chunks small enough to balance load
+    chunksize = max(1, len(tasks) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(
+            render_page_job,
+            [task[0] for task in tasks],
+            repeat(template_file),
+            [task[1] for task in tasks],
+            repeat(basepath),
+            repeat(options),
+            chunksize=chunksize,
+        )
+
+def render_page_job(input_file: str, template_file: str, output_file: str, basepath: str, options: RenderOptions = RenderOptions()) -> PageResult:
+    # Module level so it can be pickled into pool workers
+    fragment_cache = options.fragment_cache
+    timings = {} if options.profile else None
+    error = None
+    cache_stats = None
+    written = None
+    # Each worker keeps its own cache; only this page's hits and misses are sent back
+    configure_fragment_cache(fragment_cache, fragment_cache // 4)
+    if fragment_cache:
+        before = fragment_cache_stats()
+    try:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        written = generate_page(
+            input_file, template_file, output_file, basepath, options.debug,
+            timings=timings, mapped=options.mapped, render_cache=options.render_cache,
+            keep_unchanged=options.keep_unchanged, search_index=options.search_index,
+        )
+    except Exception as e:
+        if options.debug: traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+    if fragment_cache:
+        cache_stats = {name: count - before[name] for name, count in fragment_cache_stats().items()}
+    if written is None:
+        return PageResult(input_file, output_file, error, timings, cache_stats, None, None, None, None)
+    return PageResult(input_file, output_file, error, timings, cache_stats, written.render_cached, written.changed, written.title, written.terms)
+
+def render_pages_pipelined(tasks: List[tuple[str, str]], template_file: str, basepath: str, options: RenderOptions = RenderOptions(), jobs: int = 1, io_workers: int = PIPELINE_IO_WORKERS) -> tuple[List[PageResult], dict]:
+    """
+    Renders (input_file, output_file) pairs through an asyncio pipeline:
+    io_workers threads each read markdown and write pages, while the pages
+    read so far are rendered in between (on one thread, or with jobs > 1 in a
+    process pool), so slow storage no longer stalls rendering. Returns a
+    PageResult per page and the pipeline's stage and queue statistics.
+    """
+    render = partial(render_page_text, template_file=template_file, basepath=basepath, fragment_cache=options.fragment_cache, render_cache=options.render_cache, search_index=options.search_index)
+    write = partial(write_page, keep_unchanged=options.keep_unchanged)
+    if jobs == 1 or len(tasks) < 2:
+        items, stats = run_pipeline(tasks, read_markdown, render, write, io_workers)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            items, stats = run_pipeline(tasks, read_markdown, render, write, io_workers, pool, jobs)
+    results = []
+    for (input_file, output_file), info, changed, error in items:
+        render_cached, cache_stats, title, terms = info if info is not None else (None, None, None, None)
+        results.append(PageResult(input_file, output_file, error, None, cache_stats, render_cached, changed, title, terms))
+    return results, stats
+
+# The pipeline's stages; module level so the render stage can run in pool workers
+def read_markdown(task: tuple[str, str]) -> str:
+    with open(task[0], "r", encoding="utf8") as file:
+        return file.read()
+
+def render_page_text(task: tuple[str, str], markdown: str, template_file: str, basepath: str, fragment_cache: int = 0, render_cache: RenderCache = None, search_index: bool = False) -> tuple[str, tuple]:
+    # Returns the page and (render_cached, cache_stats, title, terms)
+    configure_fragment_cache(fragment_cache, fragment_cache // 4)
+    before = fragment_cache_stats()
+    template = load_template(template_file, basepath)
+    with collect_terms() if search_index else nullcontext() as terms:
+        title, content, render_cached = render_body(markdown, basepath, render_cache, terms)
+        page = template.render({"Title": title, "Content": content if isinstance(content, str) else "".join(content)})
+    cache_stats = None
+    if fragment_cache:
+        cache_stats = {name: count - before[name] for name, count in fragment_cache_stats().items()}
+    return page, (render_cached, cache_stats, title, sorted(terms) if terms is not None else None)
+
+def write_page(task: tuple[str, str], page: str, keep_unchanged: bool = False) -> bool:
+    os.makedirs(os.path.dirname(task[1]), exist_ok=True)
+    output = OutputFile(task[1], keep_unchanged, OUTPUT_BUFFER_SIZE)
+    with output as out:
+        out.write(page)
+    return output.changed
+
+def generate_pages_recursive(input_dir: str, template_path: str, output_dir: str, basepath:str, debug: bool = False) -> None:
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        if debug: print(f"Created output directory: {output_dir}")
+
+    template_file = os.path.join(template_path, "template.html")
+    for input_file, output_file in collect_pages(input_dir, output_dir):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        generate_page(input_file, template_file, output_file, basepath, debug)
                 
-def generate_page(input_file: str, template_file: str, output_file: str, basepath: str, debug: bool = False) -> None:
+def generate_page(input_file: str, template_file: str, output_file: str, basepath: str, debug: bool = False, *, timings: dict = None, mapped: bool = False, render_cache: RenderCache = None, keep_unchanged: bool = False, search_index: bool = False) -> PageWrite:
+    """
+    Renders one page. The profiled and memory-mapped paths always render, so
+    only the default one reports render cache hits. With keep_unchanged, an
+    output that already has the same bytes is not written again. With
+    search_index, the page's search terms are collected while it renders.
+    """
     if debug: print(f"Generating page from {input_file} to {output_file} using {template_file}")
-    markdown = None
-    template = None
-    with open(input_file, "r", encoding="utf8") as file1:
-        markdown = file1.read()
-    
-    with open(template_file, "r", encoding="utf8") as file2:
-        template = file2.read()
-        
-    title = extract_title(markdown)
-    html_content = markdown_to_html_node(markdown).to_html()
-    output = template.replace(r"{{ Title }}", title)
-    output = output.replace(r"{{ Content }}", html_content)
-    output = output.replace(r'href="/', f'href="{basepath}')
-    output = output.replace(r'src="/', f'src="{basepath}')
-    
-    with open(output_file, "w+", encoding="utf8") as out:
-        out.write(output)
+    with collect_terms() if search_index else nullcontext() as terms:
+        if timings is not None:
+            written = generate_page_timed(input_file, template_file, output_file, basepath, timings, keep_unchanged)
+        elif mapped:
+            written = generate_page_mapped(input_file, template_file, output_file, basepath, keep_unchanged)
+        else:
+            markdown = None
+            with open(input_file, "r", encoding="utf8") as file1:
+                markdown = file1.read()
+            template = load_template(template_file, basepath)
+            title, content, render_cached = render_body(markdown, basepath, render_cache, terms)
+
+            output = OutputFile(output_file, keep_unchanged, OUTPUT_BUFFER_SIZE)
+            with output as out:
+                template.write(out, {"Title": title, "Content": content})
+            written = PageWrite(render_cached, output.changed, title)
+    if terms is not None:
+        written = written._replace(terms=sorted(terms))
+    return written
+
+def render_body(markdown: str, basepath: str, render_cache: RenderCache = None, terms: set = None) -> tuple[str, str | Iterator[str], bool | None]:
+    """
+    Returns the page title, its body HTML and whether the body came from the
+    render cache (None without one). Without a cache the body is a stream of
+    chunks rather than one string. When terms is the set collect_terms fills,
+    cached entries add the terms stored with them, and entries stored without
+    terms count as misses.
+    """
+    cached = None
+    if render_cache is not None:
+        key = render_cache.key(markdown, basepath)
+        cached = render_cache.get(key)
+        if cached is not None and terms is not None and cached[2] is None:
+            cached = None
+    if cached is not None:
+        title, content, cached_terms = cached
+        if terms is not None:
+            terms.update(cached_terms)
+    else:
+        page = parse_markdown(markdown, basepath)
+        title = page.title
+        if render_cache is None:
+            # Stream the body straight into the output instead of building the page string
+            content = page.root.iter_html()
+        else:
+            content = "".join(page.root.iter_html())
+            render_cache.put(key, title, content, sorted(terms) if terms is not None else None)
+    return title, content, None if render_cache is None else cached is not None
+
+def generate_page_mapped(input_file: str, template_file: str, output_file: str, basepath: str, keep_unchanged: bool = False) -> PageWrite:
+    """
+    Writes the same page as generate_page from a memory-mapped source, for huge
+    markdown files. Lines are decoded from the map as the lexer asks for them
+    and every block is written out before the next one is parsed, so memory
+    use is bounded by the largest block instead of copies of the whole file.
+    """
+    template = load_template(template_file, basepath)
+    with open(input_file, "rb") as source:
+        # Empty files can't be mapped
+        if os.fstat(source.fileno()).st_size == 0:
+            raise ValueError("Markdown document cannot be empty")
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            title = title_from_lines(iter_mapped_lines(data))
+            content = iter_blocks_html(lex_lines(iter_mapped_lines(data)), basepath)
+            # A block can fail to parse after the ones before it were written
+            # out; writing to a temporary file keeps the previous output intact
+            output = OutputFile(output_file, keep_unchanged, OUTPUT_BUFFER_SIZE, atomic=True)
+            with output as out:
+                template.write(out, {"Title": title, "Content": content})
+    return PageWrite(None, output.changed, title)
+
+def iter_mapped_lines(data: mmap.mmap) -> Iterator[str]:
+    # One decoded line at a time, with the same newline handling as reading
+    # the file in text mode: \r\n and lone \r both end a line
+    position = 0
+    while True:
+        newline = data.find(b"\n", position)
+        line = data[position:len(data) if newline == -1 else newline].decode("utf8")
+        if newline != -1 and line.endswith("\r"):
+            line = line[:-1]
+        if "\r" in line:
+            yield from line.split("\r")
+        else:
+            yield line
+        if newline == -1:
+            return
+        position = newline + 1
+
+def generate_page_timed(input_file: str, template_file: str, output_file: str, basepath: str, timings: dict, keep_unchanged: bool = False) -> PageWrite:
+    """
+    Writes the same page as generate_page, but runs each stage to completion
+    instead of streaming, so the time spent in each one can be added to timings.
+    """
+    with timed(timings, "read"):
+        with open(input_file, "r", encoding="utf8") as file:
+            markdown = file.read()
+    with timed(timings, "template fill"):
+        template = load_template(template_file, basepath)
+        title = extract_title(markdown)
+    with timed(timings, "block parse"):
+        blocks = list(lex_blocks(markdown))
+    with timed(timings, "inline parse"):
+        root = ParentNode("div", [block_to_html_node(block, basepath) for block in blocks])
+    with timed(timings, "serialize"):
+        content = root.to_html()
+    with timed(timings, "template fill"):
+        page = template.render({"Title": title, "Content": content})
+    with timed(timings, "write"):
+        output = OutputFile(output_file, keep_unchanged, OUTPUT_BUFFER_SIZE)
+        with output as out:
+            out.write(page)
+    return PageWrite(None, output.changed, title)
+
+def print_report(report: dict) -> None:
+    print(f"Rendered {report['rendered']} page(s), {report['skipped']} unchanged, {report['removed']} removed, {report['failed']} failed")
+    if "identical" in report:
+        print(f"Left {report['identical']} rendered page(s) untouched, their output was already identical")
+    strategies = ", ".join(f"{name}: {count}" for name, count in report["copy_strategies"].most_common())
+    print(f"Copied {report['static_copied']} static file(s), {report['static_unchanged']} unchanged, {report['static_removed']} removed" + (f" ({strategies})" if strategies else ""))
+    cache = report.get("fragment_cache")
+    if cache is not None:
+        print(f"Fragment cache: {cache['block_hits']} block hit(s), {cache['block_misses']} miss(es); {cache['inline_hits']} list item hit(s), {cache['inline_misses']} miss(es)")
+    cache = report.get("render_cache")
+    if cache is not None:
+        print(f"Render cache: {cache['hits']} hit(s), {cache['misses']} miss(es), {cache['pruned']} entr(y/ies) pruned")
+    index = report.get("search_index")
+    if index is not None:
+        print(f"Search index: {index['pages']} page(s), {index['shards_written']} shard(s) updated")
+    pipeline = report.get("pipeline")
+    if pipeline is not None:
+        stages = ", ".join(f"{name} {stage['utilization']:.0%} of {stage['workers']}" for name, stage in pipeline["stages"].items())
+        queues = ", ".join(f"{name} queue {queue['mean']:.1f} mean / {queue['max']} max of {queue['capacity']}" for name, queue in pipeline["queues"].items())
+        print(f"Pipeline ({pipeline['wall']:.3f} s): {stages} busy; {queues}")
 
 def main():
     parser = argparse.ArgumentParser(description='Generate static site from MarkDown')  
@@ -97,8 +686,116 @@ def main():
         '--debug', '-d',
         action='store_true',
         help='print debugging information')  
+    parser.add_argument(
+        '--incremental', '-i',
+        action='store_true',
+        help='keep the output directory and only update pages and static files that changed')
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='number of pages to render in parallel (0 uses every CPU core)')
+    parser.add_argument(
+        '--checksum', '-c',
+        action='store_true',
+        help='compare static files by content hash instead of mtime when syncing')
+    parser.add_argument(
+        '--copy-strategy',
+        choices=STRATEGIES,
+        default="auto",
+        help='how static files are copied; "auto" tries reflink, copy_file_range and sendfile in turn, "hardlink" is opt-in')
+    parser.add_argument(
+        '--watch', '-w',
+        action='store_true',
+        help='keep running and rebuild whatever changes (implies --incremental)')
+    parser.add_argument(
+        '--profile', '-p',
+        type=int,
+        nargs="?",
+        const=10,
+        metavar="N",
+        help='time each build stage and list the N slowest pages (default 10)')
+    parser.add_argument(
+        '--profile-dump',
+        metavar="FILE",
+        help='save cProfile stats for the render stage to FILE; implies --profile and renders with a single job')
+    parser.add_argument(
+        '--fragment-cache',
+        type=int,
+        nargs="?",
+        const=FRAGMENT_CACHE_SIZE,
+        default=0,
+        metavar="N",
+        help=f'reuse the rendered HTML of blocks that repeat across pages, keeping up to N of them (default {FRAGMENT_CACHE_SIZE})')
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='memory-map markdown sources and render them block by block, for very large files')
+    parser.add_argument(
+        '--keep-unchanged', '-k',
+        action='store_true',
+        help='instead of cleaning the output directory, only replace files whose content changed, so unchanged ones keep their mtime')
+    parser.add_argument(
+        '--pipeline',
+        type=int,
+        nargs="?",
+        const=PIPELINE_IO_WORKERS,
+        default=0,
+        metavar="N",
+        help=f'read and write pages on N threads each in an asyncio pipeline, overlapping I/O with rendering (default {PIPELINE_IO_WORKERS})')
+    parser.add_argument(
+        '--search-index', '-s',
+        action='store_true',
+        help='write a sharded search index of every page to search/ in the output; incremental builds only update the postings of changed pages')
+    parser.add_argument(
+        '--render-cache',
+        nargs="?",
+        const=RENDER_CACHE_DIR,
+        metavar="DIR",
+        help=f'keep rendered page bodies in DIR and reuse them across builds (default {CACHE_DIR_NAME}/ in the project)')
+    parser.add_argument(
+        '--render-cache-size',
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        metavar="MB",
+        help='prune the least recently used render cache entries once it grows past MB megabytes (default %(default)s)')
     args = parser.parse_args()
-    publish(CONTENT_DIR, STATIC_DIR, PUBLIC_DIR, args.basepath, args.debug)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    profile = None
+    if args.profile is not None or args.profile_dump:
+        profile = BuildProfile(args.profile if args.profile is not None else 10, args.profile_dump)
+    if args.pipeline and (args.mmap or profile is not None):
+        parser.error("--pipeline can't be combined with --mmap or --profile")
+    if args.watch and (args.pipeline or profile is not None):
+        # Watch rebuilds go page by page, with nothing to overlap or rank
+        parser.error("--watch can't be combined with --pipeline or --profile")
+    render_cache = None
+    if args.render_cache:
+        render_cache = RenderCache(args.render_cache, args.render_cache_size * 1024 * 1024)
+    if args.watch:
+        try:
+            watch(
+                CONTENT_DIR, STATIC_DIR, PUBLIC_DIR, args.basepath,
+                debug=args.debug, jobs=jobs, checksum=args.checksum, copy_strategy=args.copy_strategy,
+                mapped=args.mmap, fragment_cache=args.fragment_cache, render_cache=render_cache,
+                keep_unchanged=args.keep_unchanged, search_index=args.search_index,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+    try:
+        report = publish(
+            CONTENT_DIR, STATIC_DIR, PUBLIC_DIR, args.basepath,
+            debug=args.debug, incremental=args.incremental, jobs=jobs, checksum=args.checksum, copy_strategy=args.copy_strategy,
+            profile=profile, mapped=args.mmap, fragment_cache=args.fragment_cache, render_cache=render_cache,
+            keep_unchanged=args.keep_unchanged, pipeline=args.pipeline, search_index=args.search_index,
+        )
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    print_report(report)
+    if profile is not None:
+        print_profile(profile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Self
+
+# Bump this whenever a change to the renderer alters the generated HTML,
+# so incremental builds know every page has to be rendered again.
+RENDERER_VERSION = "3"
+
+# Lives inside the output directory, so wiping the output also drops the manifest.
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_FORMAT = 1
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def page_inputs_hash(markdown_hash: str, template_hash: str, basepath: str) -> str:
+    # Everything that can change the rendered output of a single page
+    digest = hashlib.sha256()
+    for part in (RENDERER_VERSION, basepath, template_hash, markdown_hash):
+        digest.update(part.encode("utf8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class BuildManifest:
+    """
+    Maps each generated page (relative to the output directory) to the source
+    it came from and the hash of every input that went into rendering it.
+    """
+    def __init__(self, pages: Dict[str, dict] = None, static: List[str] = None):
+        self.pages = pages or {}
+        # Static assets copied into the output, so stale ones can be told apart from pages
+        self.static = set(static or ())
+
+    @classmethod
+    def load(cls, output_dir: str) -> Self:
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            # A missing or unreadable manifest just means a full rebuild
+            return cls()
+        if not isinstance(data, dict) or data.get("format") != MANIFEST_FORMAT:
+            return cls()
+        return cls(data.get("pages", {}), data.get("static", []))
+
+    def save(self, output_dir: str) -> None:
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        data = {"format": MANIFEST_FORMAT, "pages": self.pages, "static": sorted(self.static)}
+        with open(path, "w", encoding="utf8") as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+
+    def markdown_hash(self, output_key: str, source_file: str) -> str:
+        # Reuse the stored hash while size and mtime are unchanged, so an
+        # incremental build doesn't have to read every source file.
+        stat = os.stat(source_file)
+        entry = self.pages.get(output_key)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["markdown"]
+        return hash_file(source_file)
+
+    def is_current(self, output_key: str, inputs_hash: str) -> bool:
+        entry = self.pages.get(output_key)
+        return entry is not None and entry["hash"] == inputs_hash
+
+    def record(self, output_key: str, source_file: str, source_key: str, markdown_hash: str, inputs_hash: str) -> None:
+        stat = os.stat(source_file)
+        self.pages[output_key] = {
+            "source": source_key,
+            "markdown": markdown_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": inputs_hash,
+        }
+
+    def forget(self, output_key: str) -> None:
+        self.pages.pop(output_key, None)
+
+    def stale_outputs(self, current: Dict[str, object]) -> List[str]:
+        # Outputs we generated last time whose sources no longer exist
+        return sorted(key for key in self.pages if key not in current)
+
+    def stale_static(self, current: set) -> List[str]:
+        return sorted(key for key in self.static if key not in current)
@@ -1,9 +1,16 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
-from typing import List
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple
 from leafnode import LeafNode
 from parentnode import ParentNode
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import HTML_BUILDERS, TextNode, TextType
 from htmlnode import HTMLNode
+from fragments import FragmentCache, fragment_key
+from searchindex import tokenize
+import os
 import re
 
 class BlockType(Enum):
@@ -14,6 +21,13 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+# Inline delimiters, from the one that binds tightest to the loosest
+INLINE_DELIMITERS = (
+    ("`", TextType.CODE),
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+)
+
 def split_nodes_delimiter(old_nodes: List[TextNode], delimiter: str, text_type: TextType) -> List[TextNode]:
     new_nodes = []
     for node in old_nodes:
@@ -21,102 +35,141 @@ def split_nodes_delimiter(old_nodes: List[TextNode], delimiter: str, text_type:
             new_nodes.append(node)
             continue
         
-        chunks = node.text.split(delimiter, maxsplit=2)
-         # If no split occurred, the delimiter was not found, so add the node unchanged
-        if len(chunks) == 1:
+        text = node.text
+        opener = text.find(delimiter)
+        # If the delimiter was not found, add the node unchanged
+        if opener == -1:
             new_nodes.append(node)
             continue
 
-        # If we don't have exactly 3 parts, it's an invalid Markdown case
-        if len(chunks) != 3:
-            raise ValueError("Invalid Markdown: missing or unmatched delimiters")
-        
-        new_nodes.append(TextNode(chunks[0], TextType.TEXT))
-        new_nodes.append(TextNode(chunks[1], text_type))
-        
-        # Process the remainder recursively
-        remainder_node = TextNode(chunks[2], TextType.TEXT)
-        new_nodes.extend(split_nodes_delimiter([remainder_node], delimiter, text_type)) 
+        # Walk the delimiter pairs from a moving offset; linear in the text and no recursion
+        position = 0
+        while opener != -1:
+            content_start = opener + len(delimiter)
+            closer = text.find(delimiter, content_start)
+            # An opening delimiter without a closing one is invalid Markdown
+            if closer == -1:
+                raise ValueError("Invalid Markdown: missing or unmatched delimiters")
+
+            new_nodes.append(TextNode(text[position:opener], TextType.TEXT))
+            new_nodes.append(TextNode(text[content_start:closer], text_type))
+            position = closer + len(delimiter)
+            opener = text.find(delimiter, position)
+
+        # The remainder is kept even when empty, like the text before each pair
+        new_nodes.append(TextNode(text[position:], TextType.TEXT))
         
     return new_nodes
 
+# Images are `![alt](url)` and links `[text](url)`. The text in brackets may
+# contain balanced brackets of its own (`[a [b]](url)`, `[![img](src)](url)`)
+# but can't span lines. The URL is a run of non-space characters, may contain
+# `(...)` groups, and may be padded with whitespace inside the parentheses.
+#
+# These used to be matched with lazy `.*?` regexes, which backtrack
+# quadratically (or worse) on text with many unmatched `[` or `(`. The
+# recognizer below only ever moves forward: brackets are paired with a stack,
+# and each candidate URL is parsed deterministically with results memoized,
+# so matching stays linear in the length of the text.
+_BRACKET_TOKENS = re.compile(r"[\[\]\n]")
+_URL_CHARS = re.compile(r"[^()\s]*")
+_SPACES = re.compile(r"\s*")
+# The common `(url)` case in one step. Each part can only match one way,
+# so this can't backtrack more than linearly either.
+_SIMPLE_URL = re.compile(r"\(\s*([^()\s]+)\s*\)")
+
+def _match_brackets(text: str, start: int, end: int) -> dict[int, int]:
+    # Maps the position of each `[` to its balanced `]` on the same line
+    pairs = {}
+    stack = []
+    for token in _BRACKET_TOKENS.finditer(text, start, end):
+        char = token.group()
+        if char == "[":
+            stack.append(token.start())
+        elif char == "]":
+            if stack:
+                pairs[stack.pop()] = token.start()
+        else:
+            stack.clear()
+    return pairs
+
+def _url_body_end(text: str, position: int, end: int, memo: dict[int, int]) -> int:
+    # Runs of URL characters and `(...)` groups, consumed greedily. The result
+    # only depends on where we start, so it's shared between candidates.
+    visited = []
+    while position not in memo:
+        visited.append(position)
+        run_end = _URL_CHARS.match(text, position, end).end()
+        if run_end < end and text[run_end] == "(":
+            group_end = _URL_CHARS.match(text, run_end + 1, end).end()
+            if run_end + 1 < group_end < end and text[group_end] == ")":
+                position = group_end + 1
+                continue
+        memo[position] = run_end
+        break
+    result = memo[position]
+    for seen in visited:
+        memo[seen] = result
+    return result
+
+def _parse_url(text: str, open_paren: int, end: int, memo: dict) -> tuple[int, int, int] | None:
+    # Returns (url_start, url_end, close_paren) for the `(url)` at open_paren
+    simple = _SIMPLE_URL.match(text, open_paren, end)
+    if simple is not None:
+        return simple.start(1), simple.end(1), simple.end() - 1
+    url_start = _SPACES.match(text, open_paren + 1, end).end()
+    if _URL_CHARS.match(text, url_start, end).end() == url_start:
+        return None
+    url_end = _url_body_end(text, url_start, end, memo)
+    close_paren = memo.get(("close", url_end))
+    if close_paren is None:
+        close_paren = _SPACES.match(text, url_end, end).end()
+        memo[("close", url_end)] = close_paren
+    if close_paren >= end or text[close_paren] != ")":
+        return None
+    return url_start, url_end, close_paren
+
+def _iter_bracketed(text: str, start: int, end: int, image: bool) -> Iterator[tuple[int, int, str, str]]:
+    # Yields (start, end, text, url) for each image or link in text[start:end],
+    # leftmost first and without overlaps, like re.finditer would
+    if text.find("![" if image else "[", start, end) == -1:
+        return
+    pairs = _match_brackets(text, start, end)
+    memo = {}
+    position = start
+    for opener in sorted(pairs):
+        match_start = opener - 1 if image else opener
+        if match_start < position or (image and text[match_start] != "!"):
+            continue
+        closer = pairs[opener]
+        if closer + 1 >= end or text[closer + 1] != "(":
+            continue
+        url = _parse_url(text, closer + 1, end, memo)
+        if url is None:
+            continue
+        url_start, url_end, close_paren = url
+        yield match_start, close_paren + 1, text[opener + 1:closer], text[url_start:url_end]
+        position = close_paren + 1
+
+def iter_markdown_images(text: str, start: int = 0, end: int = None) -> Iterator[tuple[int, int, str, str]]:
+    return _iter_bracketed(text, start, len(text) if end is None else end, True)
+
+def iter_markdown_links(text: str, start: int = 0, end: int = None) -> Iterator[tuple[int, int, str, str]]:
+    return _iter_bracketed(text, start, len(text) if end is None else end, False)
+
 def extract_markdown_images(text: str) -> List[tuple[str, str]]:
-    # Verbose regex for images with comments
-    pattern = re.compile(
-        r"""
-        !\[         # Image marker and opening bracket for alt text
-        (.*?)       # Capture group 1: Alt text (non-greedy)
-        \]          # Closing bracket for alt text
-        \(          # Opening parenthesis for URL
-        \s*         # Optional whitespace
-        ([^()\s]+   # Start of capture group 2: URL - non-parenthesis, non-whitespace chars
-        (?:\([^()\s]+\)[^()\s]*)*  # Handle URLs with parentheses
-        )           # End of capture group 2
-        \s*         # Optional whitespace
-        \)          # Closing parenthesis for URL
-        """, 
-        re.VERBOSE
-    )
-    images = re.findall(pattern, text)
-    return images
+    return [(alt, url) for _, _, alt, url in iter_markdown_images(text)]
 
 def extract_markdown_links(text:str) -> List[tuple[str, str]]:
-    # Verbose regex for markdown links with comments
-    pattern = re.compile(
-        r"""
-        \[              # Opening bracket for link text
-        (
-            !?\[.*?\]   # Handle image markdown within link text (non-greedy)
-            \(.*?\)     # Handle image URL within link text (non-greedy)
-            |           # OR
-            .*?         # Regular link text (non-greedy)
-        )               # End of capture group 1: link text
-        \]              # Closing bracket for link text
-        \(              # Opening parenthesis for URL
-        \s*             # Optional whitespace
-        (
-            [^()\s]+    # Start of capture group 2: URL - non-parenthesis, non-whitespace chars
-            (?:         # Non-capturing group for handling nested parentheses
-                \([^()\s]+\)  # Match content within parentheses
-                [^()\s]*      # Followed by more URL characters
-            )*          # Zero or more occurrences of nested parentheses
-        )               # End of capture group 2
-        \s*             # Optional whitespace
-        \)              # Closing parenthesis for URL
-        """, 
-        re.VERBOSE
-    )
-    links = re.findall(pattern, text)
-    return links
+    return [(label, url) for _, _, label, url in iter_markdown_links(text)]
 
 def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
-    new_nodes = []
-    for node in old_nodes:
-        # We're not processing anything but text nodes
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        
-        # If no images, add and continue
-        images = extract_markdown_images(node.text)
-        if len(images) == 0:
-            new_nodes.append(node)
-            continue
-        
-        remaining_text = node.text
-        for text, link in images:
-            chunks = remaining_text.split(f"![{text}]({link})", maxsplit=1)
-            if chunks[0]:
-                new_nodes.append(TextNode(chunks[0], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.IMAGE, link))
-            remaining_text = chunks[1] if len(chunks) > 1 else ""
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
-        
-    return new_nodes
+    return _split_nodes_matches(old_nodes, iter_markdown_images, TextType.IMAGE)
 
 def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
+    return _split_nodes_matches(old_nodes, iter_markdown_links, TextType.LINK)
+
+def _split_nodes_matches(old_nodes: List[TextNode], find_matches: Callable, text_type: TextType) -> List[TextNode]:
     new_nodes = []
     for node in old_nodes:
         # We're not processing anything but text nodes
@@ -124,179 +177,491 @@ def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
             new_nodes.append(node)
             continue
         
-        # If no imagelinkss, add and continue
-        links = extract_markdown_links(node.text)
-        if len(links) == 0:
+        # Slice the text by match spans instead of rebuilding and re-splitting
+        # each `[text](url)`, which broke on URLs with surrounding whitespace
+        text = node.text
+        position = 0
+        for match_start, match_end, label, url in find_matches(text):
+            if match_start > position:
+                new_nodes.append(TextNode(text[position:match_start], TextType.TEXT))
+            new_nodes.append(TextNode(label, text_type, url))
+            position = match_end
+
+        # If nothing matched, add the node unchanged
+        if position == 0:
             new_nodes.append(node)
-            continue
-        
-        remaining_text = node.text
-        for text, link in links:
-            chunks = remaining_text.split(f"[{text}]({link})", maxsplit=1)
-            if chunks[0]:
-                new_nodes.append(TextNode(chunks[0], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.LINK, link))
-            remaining_text = chunks[1] if len(chunks) > 1 else ""
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
         
     return new_nodes
 
 def text_to_textnodes(text: str) -> List[TextNode]:
-    new_nodes = [TextNode(text, TextType.TEXT)]
-    new_nodes = split_nodes_image(new_nodes)
-    new_nodes = split_nodes_link(new_nodes)
-    new_nodes = split_nodes_delimiter(new_nodes, "`", TextType.CODE)
-    new_nodes = split_nodes_delimiter(new_nodes, "**", TextType.BOLD)
-    new_nodes = split_nodes_delimiter(new_nodes, "_", TextType.ITALIC)
-    # Adjusted empty-node cleaner, leaves single spaces alone
-    new_nodes = [node for node in new_nodes if not (node.text_type == TextType.TEXT and (node.text.strip() == "" and node.text != " "))]
-    return new_nodes
+    """
+    Splits inline markdown into TextNodes in a single left-to-right scan.
+    Produces the same nodes as running split_nodes_image, split_nodes_link and
+    split_nodes_delimiter (for `, ** and _) in that order, without building
+    the intermediate node lists. Precedence works the same way: images and
+    links take their text verbatim, and a delimiter never pairs across one of
+    higher precedence.
+    """
+    nodes = []
+    position = 0
+    for image_start, image_end, alt, url in iter_markdown_images(text):
+        _scan_links(text, position, image_start, nodes)
+        nodes.append(TextNode(alt, TextType.IMAGE, url))
+        position = image_end
+    _scan_links(text, position, len(text), nodes)
+    return nodes
 
-def markdown_to_blocks(markdown: str) -> List[str]:
-    blocks = markdown.split("\n\n")
-    blocks = [block.strip() for block in blocks]
-    blocks = [block for block in blocks if block]
-    return blocks
+def _scan_links(text: str, start: int, end: int, nodes: List[TextNode]) -> None:
+    position = start
+    for link_start, link_end, label, url in iter_markdown_links(text, start, end):
+        _scan_delimiters(text, position, link_start, nodes)
+        nodes.append(TextNode(label, TextType.LINK, url))
+        position = link_end
+    _scan_delimiters(text, position, end, nodes)
 
-def block_to_block_type(block: str) -> BlockType:
-    match block[0]:
-        # Header, 1-6 # + plus space
-        # We can skip counting, but it should have the space in position 1 to 6
+def _scan_delimiters(text: str, start: int, end: int, nodes: List[TextNode]) -> None:
+    # Next known position of each delimiter, -1 once there are no more before `end`
+    next_at = [text.find(delimiter, start, end) for delimiter, _ in INLINE_DELIMITERS]
+    position = start
+    while True:
+        opener, index = -1, -1
+        for i, (delimiter, _) in enumerate(INLINE_DELIMITERS):
+            if -1 < next_at[i] < position:
+                # Consumed inside an earlier span; look again from where we are
+                next_at[i] = text.find(delimiter, position, end)
+            if next_at[i] != -1 and (opener == -1 or next_at[i] < opener):
+                opener, index = next_at[i], i
+
+        if opener == -1:
+            _append_text(nodes, text[position:end])
+            return
+
+        delimiter, text_type = INLINE_DELIMITERS[index]
+        # A span can't reach past the next delimiter that binds tighter
+        bound = min((at for at in next_at[:index] if at != -1), default=end)
+        content_start = opener + len(delimiter)
+        closer = text.find(delimiter, content_start, bound)
+        if closer == -1:
+            raise ValueError("Invalid Markdown: missing or unmatched delimiters")
+
+        _append_text(nodes, text[position:opener])
+        nodes.append(TextNode(text[content_start:closer], text_type))
+        position = closer + len(delimiter)
+
+def _append_text(nodes: List[TextNode], text: str) -> None:
+    # Same cleanup the multi-pass pipeline did: drop empty and whitespace-only
+    # text, but keep single spaces that separate two inline elements
+    if text.strip() or text == " ":
+        nodes.append(TextNode(text, TextType.TEXT))
+
+class Block(NamedTuple):
+    block_type: BlockType
+    # The block's lines, with the first one left-stripped and the last one right-stripped
+    lines: List[str]
+
+FENCE = "```"
+
+def lex_blocks(markdown: str) -> Iterator[Block]:
+    return lex_lines(markdown.split("\n"))
+
+def lex_lines(lines: Iterable[str], fences: bool = True) -> Iterator[Block]:
+    """
+    Splits markdown, given as its lines, into typed blocks in a single pass.
+    Blocks are separated by blank lines, except inside fenced code, which
+    runs until the closing fence and keeps any blank lines it contains.
+    Lines are consumed as they come, so they can be read lazily from a file;
+    only the block being collected is held in memory.
+    """
+    block: List[str] = []
+    # Lines of an open fence, and whether its last line could close it
+    fence: List[str] | None = None
+    closing = False
+    for line in lines:
+        if fence is not None:
+            # The fence closes on the first line that ends with ``` right before
+            # a blank line (or the end), which may be the opening line itself
+            if closing and not line.strip():
+                yield _code_block(fence)
+                fence, closing = None, False
+                continue
+            fence.append(line)
+            closing = line.rstrip().endswith(FENCE)
+            continue
+
+        if not line.strip():
+            if block:
+                yield _block(block)
+                block = []
+            continue
+        if block:
+            block.append(line)
+            continue
+
+        first = line.lstrip()
+        if fences and first.startswith(FENCE):
+            fence = [first]
+            closing = len(first.rstrip()) >= 2 * len(FENCE) and first.rstrip().endswith(FENCE)
+        else:
+            block = [first]
+
+    if fence is not None:
+        if closing:
+            yield _code_block(fence)
+        else:
+            # Nothing after the opening line could close it, so nothing after a
+            # later one could either: lex the rest as ordinary blocks, once.
+            yield from lex_lines(fence, fences=False)
+    elif block:
+        yield _block(block)
+
+def _block(lines: List[str]) -> Block:
+    lines[-1] = lines[-1].rstrip()
+    return Block(classify_lines(lines), lines)
+
+def _code_block(lines: List[str]) -> Block:
+    lines[-1] = lines[-1].rstrip()
+    return Block(BlockType.CODE, lines)
+
+def classify_lines(lines: List[str]) -> BlockType:
+    first = lines[0]
+    match first[0]:
+        # Header, 1-6 # followed by a space
         case "#":
-            for i in range(1, 7):
-                if block[i] == "#":
-                    continue
-                if block[i] == " ":
-                    return BlockType.HEADING
+            level = len(first) - len(first.lstrip("#"))
+            if level <= 6 and first[level:level + 1] == " ":
+                return BlockType.HEADING
             return BlockType.PARAGRAPH
         # Code, ``` + text + ```
         # Needs correct amounts of both sets
         case "`":
-            if block[0:3] == "```" and block[-3:] == "```":
+            if first.startswith(FENCE) and lines[-1].endswith(FENCE):
                 return BlockType.CODE
             return BlockType.PARAGRAPH
         # Quote, all lines need this
         case ">":
-            for line in block.split("\n"):
-                if line[0] != ">":
+            for line in lines:
+                if not line.startswith(">"):
                     return BlockType.PARAGRAPH
             return BlockType.QUOTE
         # Unordered list, all lines need this + space
         case "-":
-            for line in block.split("\n"):
-                if line[0:2] != "- ":
+            for line in lines:
+                if not line.startswith("- "):
                     return BlockType.PARAGRAPH
             return BlockType.UNORDERED_LIST
         # Ordered list, has to start at 1, increase for following lines
         # Also requires '. ' after each number
         case "1":
-            lines = block.split("\n")
-            for i in range(0, len(lines)):
-                if lines[i][:3] != f"{i+1}. ":
+            for i, line in enumerate(lines, 1):
+                if not line.startswith(f"{i}. "):
                     return BlockType.PARAGRAPH
             return BlockType.ORDERED_LIST
         # Normal paragraph
         case _:
             return BlockType.PARAGRAPH
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    new_children = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        md_type = block_to_block_type(block)
-        match (md_type):
+def markdown_to_blocks(markdown: str) -> List[str]:
+    return ["\n".join(block.lines) for block in lex_blocks(markdown)]
+
+def block_to_block_type(block: str) -> BlockType:
+    return classify_lines(block.split("\n"))
+
+def markdown_to_html_node(markdown: str, basepath: str = "/") -> HTMLNode:
+    # Root-relative link and image URLs are rewritten below basepath as the nodes are built
+    new_children = [block_to_html_node(block, basepath) for block in lex_blocks(markdown)]
+    return ParentNode.trusted("div", new_children)
+
+class RenderResult(NamedTuple):
+    # The document's HTML, or None if it failed to render
+    html: str | None
+    # None on success, otherwise "ExceptionType: message"
+    error: str | None
+
+def render_many(documents: Iterable[str], jobs: int = 1, chunksize: int = 64, basepath: str = "/") -> Iterator[RenderResult]:
+    """
+    Renders markdown documents (snippets need no title) and yields a
+    RenderResult for each, in input order. A document that fails to render
+    gets its error instead of HTML; the rest of the batch carries on. With
+    jobs > 1, the documents are sent to a process pool in chunks of
+    chunksize, with only a few chunks per worker in flight at a time, so
+    large or lazy iterables are never read in all at once. As with --jobs,
+    0 or less means one job per CPU core.
+    """
+    documents = iter(documents)
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    if jobs == 1:
+        for markdown in documents:
+            yield _render_one(markdown, basepath)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = deque()
+        while True:
+            while len(in_flight) < jobs * 2:
+                chunk = list(islice(documents, chunksize))
+                if not chunk:
+                    break
+                in_flight.append(pool.submit(_render_chunk, chunk, basepath))
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
+
+def _render_one(markdown: str, basepath: str) -> RenderResult:
+    try:
+        return RenderResult(markdown_to_html_node(markdown, basepath).to_html(), None)
+    except Exception as e:
+        return RenderResult(None, f"{type(e).__name__}: {e}")
+
+def _render_chunk(documents: List[str], basepath: str) -> List[RenderResult]:
+    # Runs in pool workers, one round trip per chunk
+    return [_render_one(markdown, basepath) for markdown in documents]
+
+class ParsedPage(NamedTuple):
+    root: HTMLNode
+    # The text of the first "# " line, as extract_title finds it
+    title: str
+    # Plain text of the first paragraph, or None if there isn't one
+    summary: str | None
+    # Words of prose, outside of code blocks and without block markers
+    word_count: int
+    # (level, plain text) for every heading, in document order
+    outline: List[tuple[int, str]]
+
+def parse_markdown(markdown: str, basepath: str = "/") -> ParsedPage:
+    """
+    Builds the HTML tree like markdown_to_html_node and gathers the page's
+    metadata on the way, so the source is split and lexed only once and the
+    outline and summary come from the TextNodes the tree is built from. Raises
+    the same ValueErrors as extract_title for empty or untitled documents.
+    """
+    if not markdown:
+        raise ValueError("Markdown document cannot be empty")
+    titles: List[str] = []
+    def find_title(lines: Iterable[str]) -> Iterator[str]:
+        # Looks at every line on its way into the lexer, before it strips any
+        for line in lines:
+            if not titles and line.startswith("# "):
+                titles.append(line[2:].strip())
+            yield line
+
+    children = []
+    summary = None
+    word_count = 0
+    outline = []
+    for block in lex_lines(find_title(markdown.split("\n"))):
+        text = None
+        if block.block_type == BlockType.HEADING or (block.block_type == BlockType.PARAGRAPH and summary is None):
+            node, text = _block_with_plain_text(block, basepath)
+        else:
+            node = block_to_html_node(block, basepath)
+        children.append(node)
+        match block.block_type:
             case BlockType.HEADING:
-                new_children.append(create_header_node(block))
-            case BlockType.CODE:
-                new_children.append(create_code_node(block))
-            case BlockType.QUOTE:
-                new_children.append(create_quote_node(block))
-            case BlockType.UNORDERED_LIST:
-                new_children.append(create_unordered_list(block))
-            case BlockType.ORDERED_LIST:
-                new_children.append(create_ordered_list(block))
+                if text is None:
+                    # Read the way create_header_node reads the block
+                    text = plain_text("\n".join(block.lines).lstrip("#").strip())
+                # A heading's lines stay joined by newlines when it's rendered
+                outline.append((len(block.lines[0]) - len(block.lines[0].lstrip("#")), text.replace("\n", " ")))
+                word_count += sum(len(line.split()) for line in block.lines) - 1
             case BlockType.PARAGRAPH:
-                new_children.append(create_paragraph(block))
-            # This *really* *should* *not* happen. block_to_block_types will return PARAGRAPH
-            # for unknown blocks, but leaving in a guard isn't a bad thing.
-            case _:
-                raise ValueError("unknown block type! help!")
-    
-    return ParentNode("div", new_children)
+                if summary is None:
+                    summary = text if text is not None else plain_text(" ".join(block.lines))
+                word_count += sum(len(line.split()) for line in block.lines)
+            case BlockType.QUOTE:
+                word_count += sum(len(line.lstrip(">").split()) for line in block.lines)
+            case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+                word_count += sum(len(line.split()) - 1 for line in block.lines)
+    if not titles:
+        raise ValueError("No title in markdown document")
+    return ParsedPage(ParentNode.trusted("div", children), titles[0], summary, word_count, outline)
+
+def _block_with_plain_text(block: Block, basepath: str) -> tuple[HTMLNode, str | None]:
+    # Takes the plain text of a heading or paragraph from the TextNodes its
+    # single inline run is built from. None if the block came out of the
+    # fragment cache, where no TextNodes were made.
+    global _plain_text
+    outer, _plain_text = _plain_text, []
+    try:
+        node = block_to_html_node(block, basepath)
+        texts = _plain_text
+    finally:
+        _plain_text = outer
+    return node, texts[0] if texts else None
+
+def plain_text(text: str) -> str:
+    # What inline markdown reads as, without markup; images have no text of their own
+    return "".join(node.text for node in text_to_textnodes(text) if node.text_type != TextType.IMAGE)
+
+def iter_blocks_html(blocks: Iterable[Block], basepath: str = "/") -> Iterator[str]:
+    # The same markup as markdown_to_html_node(...).iter_html(), but each block
+    # is parsed only when the previous one has been serialized, so the tree
+    # for the whole document never exists at once
+    yield "<div>"
+    for block in blocks:
+        yield from block_to_html_node(block, basepath).iter_html()
+    yield "</div>"
 
-def create_header_node(block: str) -> HTMLNode:
+# Optional memoization of rendered fragments, off unless configure_fragment_cache
+# is called. Kept per process, like the compiled templates.
+_block_cache: FragmentCache | None = None
+_inline_cache: FragmentCache | None = None
+
+def configure_fragment_cache(block_entries: int, inline_entries: int) -> None:
+    """
+    Caches the rendered HTML of up to block_entries blocks and inline_entries
+    list items, keyed by their content, so text that repeats across pages
+    (disclaimers, bios, "see also" lists) is only parsed once. Zero turns a
+    cache off. Caches that already have the requested size are kept.
+    """
+    global _block_cache, _inline_cache
+    if _block_cache is None or _block_cache.max_entries != block_entries:
+        _block_cache = FragmentCache(block_entries) if block_entries else None
+    if _inline_cache is None or _inline_cache.max_entries != inline_entries:
+        _inline_cache = FragmentCache(inline_entries) if inline_entries else None
+
+def fragment_cache_stats() -> dict:
+    stats = {}
+    for name, cache in (("block", _block_cache), ("inline", _inline_cache)):
+        stats[f"{name}_hits"] = cache.hits if cache else 0
+        stats[f"{name}_misses"] = cache.misses if cache else 0
+    return stats
+
+# Search terms of the text being rendered, while collect_terms is active
+_terms: set | None = None
+# Plain text of each inline run built, while parse_markdown wants it
+_plain_text: List[str] | None = None
+
+@contextmanager
+def collect_terms() -> Iterator[set]:
+    """
+    Gathers the search terms (see searchindex.tokenize) of the inline text
+    rendered inside the with block, from the TextNodes the inline scanner
+    produces anyway. Fragments served from the cache bring along the terms
+    they were stored with. Nested blocks also add their terms to outer ones.
+    """
+    global _terms
+    outer = _terms
+    _terms = set()
+    try:
+        yield _terms
+    finally:
+        collected, _terms = _terms, outer
+        if outer is not None:
+            outer.update(collected)
+
+def _cached_fragment(cache: FragmentCache, key: bytes, render: Callable[[], str]) -> str:
+    # Entries are (html, terms); terms is None if they weren't being collected
+    cached = cache.get(key)
+    if cached is None or (_terms is not None and cached[1] is None):
+        if _terms is None:
+            cached = (render(), None)
+        else:
+            with collect_terms() as terms:
+                html = render()
+            cached = (html, frozenset(terms))
+        cache.put(key, cached)
+    elif _terms is not None:
+        _terms.update(cached[1])
+    return cached[0]
+
+def block_to_html_node(block: Block, basepath: str = "/") -> HTMLNode:
+    if _block_cache is None:
+        return build_block_node(block, basepath)
+    key = fragment_key(block.block_type.value, "\n".join(block.lines), basepath)
+    html = _cached_fragment(_block_cache, key, lambda: build_block_node(block, basepath).to_html())
+    # A tagless leaf is written out verbatim
+    return LeafNode.trusted(None, html)
+
+def build_block_node(block: Block, basepath: str = "/") -> HTMLNode:
+    match (block.block_type):
+        case BlockType.HEADING:
+            return create_header_node(block, basepath)
+        case BlockType.CODE:
+            return create_code_node(block)
+        case BlockType.QUOTE:
+            return create_quote_node(block, basepath)
+        case BlockType.UNORDERED_LIST:
+            return create_unordered_list(block, basepath)
+        case BlockType.ORDERED_LIST:
+            return create_ordered_list(block, basepath)
+        case BlockType.PARAGRAPH:
+            return create_paragraph(block, basepath)
+        # This *really* *should* *not* happen. classify_lines will return PARAGRAPH
+        # for unknown blocks, but leaving in a guard isn't a bad thing.
+        case _:
+            raise ValueError("unknown block type! help!")
+
+def inline_children(text: str, basepath: str = "/") -> List[HTMLNode]:
+    text_nodes = text_to_textnodes(text)
+    if _terms is not None or _plain_text is not None:
+        # One pass over the run's text; an image's alt text describes the
+        # image rather than being part of the page's text
+        texts = [node.text for node in text_nodes if node.text_type != TextType.IMAGE]
+        if _terms is not None:
+            _terms.update(tokenize(" ".join(texts)))
+        if _plain_text is not None:
+            _plain_text.append("".join(texts))
+    # The scanner only produces known text types, so index the builders directly
+    return [HTML_BUILDERS[text_node.text_type](text_node, basepath) for text_node in text_nodes]
+
+def cached_inline_children(text: str, basepath: str = "/") -> List[HTMLNode]:
+    # For runs that repeat inside otherwise different blocks, like list items
+    if _inline_cache is None:
+        return inline_children(text, basepath)
+    key = fragment_key("inline", text, basepath)
+    html = _cached_fragment(_inline_cache, key, lambda: "".join(child.to_html() for child in inline_children(text, basepath)))
+    # Nothing to render stays empty, so the parent raises as it would uncached
+    return [LeafNode.trusted(None, html)] if html else []
+
+def create_header_node(block: Block, basepath: str = "/") -> HTMLNode:
+    text = "\n".join(block.lines)
     i = 0
-    while i < len(block) and block[i] == "#":
+    while i < len(text) and text[i] == "#":
         i += 1
     
-    text = block[i:].strip()
-    text_nodes = text_to_textnodes(text)
-    html_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
-    node = ParentNode(f"h{i}", html_nodes)
-    return node
-
-def create_code_node(block: str) -> HTMLNode:
-    block = block[3:-3] # Only strip leading/trailing backticks
-    if block.startswith("\n"):
-        block = block[1:] # But also remove opening newlines, if present
+    return ParentNode.trusted(f"h{i}", inline_children(text[i:].strip(), basepath))
+
+def create_code_node(block: Block) -> HTMLNode:
+    text = "\n".join(block.lines)[3:-3] # Only strip leading/trailing backticks
+    if text.startswith("\n"):
+        text = text[1:] # But also remove opening newlines, if present
         
-    node = LeafNode("code", block)
-    parent = ParentNode("pre", [node])
+    node = LeafNode.trusted("code", text)
+    parent = ParentNode.trusted("pre", [node])
     
     return parent
 
 
-def create_quote_node(block: str) -> HTMLNode:
-    block = "\n".join([line.lstrip(">").strip() for line in block.split("\n")])
-    text_nodes = text_to_textnodes(block)
-    html_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
-    node = ParentNode("blockquote", html_nodes)
-    
-    return node
+def create_quote_node(block: Block, basepath: str = "/") -> HTMLNode:
+    text = "\n".join([line.lstrip(">").strip() for line in block.lines])
+    return ParentNode.trusted("blockquote", inline_children(text, basepath))
 
-def create_unordered_list(block: str) -> HTMLNode:
-    pattern = re.compile(r"^-")
-    list_items = []
-    lines = block.split("\n")
-    for line in lines:
-        line = re.sub(pattern, "", line)
-        text_nodes = text_to_textnodes(line.strip())
-        html_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
-        ul_node = ParentNode("li", html_nodes)
-        list_items.append(ul_node)
-    parent = ParentNode("ul", list_items)
-    
-    return parent
+def create_unordered_list(block: Block, basepath: str = "/") -> HTMLNode:
+    # The lexer already checked every line starts with "- "
+    list_items = [ParentNode.trusted("li", cached_inline_children(line[1:].strip(), basepath)) for line in block.lines]
+    return ParentNode.trusted("ul", list_items)
 
-def create_ordered_list(block: str) -> HTMLNode:
-    pattern = re.compile(r"^\d+?\.")
+def create_ordered_list(block: Block, basepath: str = "/") -> HTMLNode:
+    # Line i starts with "i. ", so the marker is as long as the number plus the dot
     list_items = []
-    lines = block.split("\n")
-    for line in lines:
-        line = re.sub(pattern, "", line)
-        text_nodes = text_to_textnodes(line.strip())
-        html_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
-        ol_node = ParentNode("li", html_nodes)
-        list_items.append(ol_node)
-    parent = ParentNode("ol", list_items)
-    
-    return parent
+    for i, line in enumerate(block.lines, 1):
+        list_items.append(ParentNode.trusted("li", cached_inline_children(line[len(str(i)) + 1:].strip(), basepath)))
+    return ParentNode.trusted("ol", list_items)
 
-def create_paragraph(block: str) -> List[HTMLNode]:
+def create_paragraph(block: Block, basepath: str = "/") -> HTMLNode:
     #  Normalize: Collapse single newlines into spaces
-    block = block.replace("\n", " ")  # Only applies to paragraph blocks
-    text_nodes = text_to_textnodes(block)
-    children = [text_node_to_html_node(node) for node in text_nodes]
-    node = ParentNode("p", children)
-    
-    return node
+    return ParentNode.trusted("p", inline_children(" ".join(block.lines), basepath))
 
 def extract_title(markdown: str) -> str:
     if not markdown:
         raise ValueError("Markdown document cannot be empty")
-    for line in markdown.split("\n"):
+    return title_from_lines(markdown.split("\n"))
+
+def title_from_lines(lines: Iterable[str]) -> str:
+    # Stops at the title, so lazily read lines are only consumed up to there
+    for line in lines:
         if line.startswith("# "):
             return line[2:].strip()
     
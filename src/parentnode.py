@@ -1,17 +1,41 @@
-from typing import List
-from htmlnode import HTMLNode
+from typing import Iterator, List, Mapping, Self
+from htmlnode import EMPTY_PROPS, HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: List[HTMLNode], props: dict = None):
         super().__init__(tag, None, children, props)
         if not self.tag:
             raise ValueError("ParentNode must have a tag")
         if not self.children:
             raise ValueError("ParentNode must have child nodes")
+
+    @classmethod
+    def trusted(cls, tag: str, children: List[HTMLNode], props: Mapping[str, str] = EMPTY_PROPS) -> Self:
+        """
+        Builds a node for trees the parser generates, which always have a tag.
+        Empty documents and list items still end up here without children,
+        so that check stays.
+        """
+        if not children:
+            raise ValueError("ParentNode must have child nodes")
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.value = None
+        node.children = children
+        node.props = props
+        return node
     
     def to_html(self) -> str:        
         children = ''.join([child.to_html() for child in self.children])
         # Serialize properties
         props_string = self.props_to_html()
         
-        return f"<{self.tag}{props_string}>{children}</{self.tag}>"
\ No newline at end of file
+        return f"<{self.tag}{props_string}>{children}</{self.tag}>"
+
+    def iter_html(self) -> Iterator[str]:
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
\ No newline at end of file
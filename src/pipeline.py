@@ -0,0 +1,128 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+# Items each queue holds before the stage in front of it has to wait
+QUEUE_SIZE = 32
+
+STAGE_NAMES = ("read", "render", "write")
+
+class PipelineItem(NamedTuple):
+    task: object
+    # Whatever render returned next to the output, None if it never ran
+    info: object
+    # What write returned, None if it never ran
+    written: object
+    # None on success, otherwise "ExceptionType: message"
+    error: str | None
+
+class QueueStats:
+    """Queue depth, sampled every time an item is put in."""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+
+    def sample(self, depth: int) -> None:
+        self.samples += 1
+        self.total += depth
+        self.max = max(self.max, depth)
+
+    def summary(self) -> dict:
+        return {"capacity": self.capacity, "max": self.max, "mean": self.total / self.samples if self.samples else 0.0}
+
+def run_pipeline(tasks: Iterable, read: Callable, render: Callable, write: Callable, io_workers: int = 8, render_executor: Executor = None, render_workers: int = 1, queue_size: int = QUEUE_SIZE) -> tuple[List[PipelineItem], dict]:
+    """
+    Runs every task through three stages connected by bounded queues:
+    read(task) and write(task, output) on io_workers threads each, and
+    render(task, data) -> (output, info) on render_executor (a single thread
+    if not given) with up to render_workers tasks in flight. While one file
+    waits on the disk or the network, others are being rendered or written.
+    render has to be picklable if render_executor is a process pool.
+
+    Returns one PipelineItem per task, in completion order, and statistics:
+    per stage the busy time and utilization (busy time over wall time times
+    workers), per queue the capacity and the mean and max depth.
+    """
+    # Reads and writes get their own threads, so time spent waiting for one
+    # never shows up as the other being busy
+    with ThreadPoolExecutor(io_workers, "pipeline-read") as read_pool, ThreadPoolExecutor(io_workers, "pipeline-write") as write_pool:
+        if render_executor is None:
+            with ThreadPoolExecutor(1, "pipeline-render") as render_pool:
+                return asyncio.run(_run(tasks, read, render, write, read_pool, write_pool, io_workers, render_pool, 1, queue_size))
+        return asyncio.run(_run(tasks, read, render, write, read_pool, write_pool, io_workers, render_executor, render_workers, queue_size))
+
+async def _run(tasks: Iterable, read: Callable, render: Callable, write: Callable, read_pool: Executor, write_pool: Executor, io_workers: int, render_pool: Executor, render_workers: int, queue_size: int) -> tuple[List[PipelineItem], dict]:
+    loop = asyncio.get_running_loop()
+    render_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    queues = {"render": QueueStats(queue_size), "write": QueueStats(queue_size)}
+    busy: Dict[str, float] = dict.fromkeys(STAGE_NAMES, 0.0)
+    results: List[PipelineItem] = []
+    # Shared by all readers; each takes the next task when it has room
+    pending = iter(tasks)
+
+    async def run_stage(stage: str, executor: Executor, function: Callable, *args):
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        finally:
+            busy[stage] += time.perf_counter() - started
+
+    async def reader() -> None:
+        for task in pending:
+            try:
+                data = await run_stage("read", read_pool, read, task)
+            except Exception as e:
+                results.append(PipelineItem(task, None, None, f"{type(e).__name__}: {e}"))
+                continue
+            await render_queue.put((task, data))
+            queues["render"].sample(render_queue.qsize())
+
+    async def renderer() -> None:
+        while (item := await render_queue.get()) is not None:
+            task, data = item
+            try:
+                output, info = await run_stage("render", render_pool, render, task, data)
+            except Exception as e:
+                results.append(PipelineItem(task, None, None, f"{type(e).__name__}: {e}"))
+                continue
+            await write_queue.put((task, output, info))
+            queues["write"].sample(write_queue.qsize())
+
+    async def writer() -> None:
+        while (item := await write_queue.get()) is not None:
+            task, output, info = item
+            try:
+                written = await run_stage("write", write_pool, write, task, output)
+            except Exception as e:
+                results.append(PipelineItem(task, info, None, f"{type(e).__name__}: {e}"))
+                continue
+            results.append(PipelineItem(task, info, written, None))
+
+    started = time.perf_counter()
+    readers = [asyncio.create_task(reader()) for _ in range(io_workers)]
+    renderers = [asyncio.create_task(renderer()) for _ in range(render_workers)]
+    writers = [asyncio.create_task(writer()) for _ in range(io_workers)]
+    # Each stage is told to stop once everything in front of it has finished
+    await asyncio.gather(*readers)
+    for _ in renderers:
+        await render_queue.put(None)
+    await asyncio.gather(*renderers)
+    for _ in writers:
+        await write_queue.put(None)
+    await asyncio.gather(*writers)
+    wall = time.perf_counter() - started
+
+    workers = {"read": io_workers, "render": render_workers, "write": io_workers}
+    stats = {
+        "wall": wall,
+        "stages": {
+            stage: {"workers": workers[stage], "busy": busy[stage], "utilization": busy[stage] / (wall * workers[stage]) if wall else 0.0}
+            for stage in STAGE_NAMES
+        },
+        "queues": {name: queue.summary() for name, queue in queues.items()},
+    }
+    return results, stats
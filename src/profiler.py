@@ -0,0 +1,62 @@
+import cProfile
+import heapq
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Build stages in the order they run; the last six are timed per page
+STAGES = ("clean", "static copy", "scan", "read", "block parse", "inline parse", "serialize", "template fill", "write")
+PAGE_STAGES = STAGES[3:]
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    # Adds the time spent in the block to timings[stage]
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+class BuildProfile:
+    """
+    Collects how long each build stage took, summed over all pages, and the
+    per-page totals needed to rank the slowest pages. With dump_file set, the
+    render stage also runs under cProfile and its stats are saved there.
+    """
+    def __init__(self, slowest: int = 10, dump_file: str = None):
+        self.slowest = slowest
+        self.dump_file = dump_file
+        self.profiler = cProfile.Profile() if dump_file else None
+        self.stages: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        # (seconds, input_file, markdown bytes, html bytes)
+        self.pages: List[tuple[float, str, int, int]] = []
+        self.wall = 0.0
+
+    def stage(self, name: str):
+        return timed(self.stages, name)
+
+    def add_page(self, input_file: str, input_size: int, output_size: int, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.stages[stage] += seconds
+        self.pages.append((sum(timings.values()), input_file, input_size, output_size))
+
+    def slowest_pages(self) -> List[tuple[float, str, int, int]]:
+        return heapq.nlargest(self.slowest, self.pages)
+
+    def save_stats(self) -> None:
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.dump_file)
+
+def print_profile(profile: BuildProfile) -> None:
+    total = sum(profile.stages.values()) or 1.0
+    print(f"Build profile ({profile.wall:.3f} s wall time; page stages are summed over all workers):")
+    for stage in STAGES:
+        seconds = profile.stages[stage]
+        print(f"  {stage:14} {seconds:9.3f} s {seconds / total:7.1%}")
+    slowest = profile.slowest_pages()
+    if slowest:
+        print(f"Slowest {len(slowest)} page(s):")
+        for seconds, input_file, input_size, output_size in slowest:
+            print(f"  {seconds * 1000:9.1f} ms  {input_file} ({input_size / 1024:.1f} KiB markdown, {output_size / 1024:.1f} KiB HTML)")
+    if profile.dump_file:
+        print(f"Saved cProfile stats for the render stage to {profile.dump_file}")
@@ -0,0 +1,122 @@
+import hashlib
+import os
+from typing import List
+
+from manifest import RENDERER_VERSION
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Everything that decides what a page body renders to, and which search terms
+# are stored with it. A change to any of these files gives every entry a new
+# key, so stale HTML or terms are never served.
+RENDERER_MODULES = ("md_handler.py", "textnode.py", "htmlnode.py", "leafnode.py", "parentnode.py", "searchindex.py")
+
+CACHE_DIR_NAME = ".static-gen-cache"
+# Bumped whenever the layout of an entry changes
+ENTRY_FORMAT = "2"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_renderer_hash: str | None = None
+
+def renderer_hash() -> str:
+    # Hashed once per process; the sources can't change under a running build
+    global _renderer_hash
+    if _renderer_hash is None:
+        digest = hashlib.sha256(RENDERER_VERSION.encode("utf8"))
+        for name in RENDERER_MODULES:
+            with open(os.path.join(SCRIPT_DIR, name), "rb") as file:
+                digest.update(b"\0" + file.read())
+        _renderer_hash = digest.hexdigest()
+    return _renderer_hash
+
+class RenderCache:
+    """
+    Rendered page bodies and titles on disk, keyed by the content hash of the
+    markdown plus the renderer hash, so they survive between builds. Entries
+    are plain files (the title on the first line, the page's search terms on
+    the second, then the body HTML), fanned out over subdirectories by the
+    first two characters of their key. Once the cache grows past max_bytes,
+    prune() drops the least recently used ones.
+    """
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, markdown: str, basepath: str = "/") -> str:
+        # Links are rendered below the basepath, so each deployment has its own entries
+        digest = hashlib.sha256(renderer_hash().encode("utf8"))
+        digest.update(b"\0")
+        digest.update(ENTRY_FORMAT.encode("utf8"))
+        digest.update(b"\0")
+        digest.update(basepath.encode("utf8"))
+        digest.update(b"\0")
+        digest.update(markdown.encode("utf8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key: str) -> tuple[str, str, List[str] | None] | None:
+        # Returns (title, body, terms); terms is None if they weren't collected
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf8", newline="\n") as file:
+                title = file.readline()[:-1]
+                terms = file.readline()[:-1]
+                body = file.read()
+        except FileNotFoundError:
+            return None
+        # Mark it as recently used for pruning
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        # Terms are words, so they can't contain the spaces that separate them
+        return title, body, terms[1:].split() if terms else None
+
+    def put(self, key: str, title: str, body: str, terms: List[str] | None = None) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and moved into place, so parallel workers never see half an entry
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf8", newline="\n") as file:
+            file.write(title)
+            file.write("\n")
+            if terms is not None:
+                # Marked, so collected-but-none can be told apart from not collected
+                file.write("+" + " ".join(terms))
+            file.write("\n")
+            file.write(body)
+        os.replace(temp_path, path)
+
+    def prune(self) -> int:
+        """
+        Deletes the least recently used entries until the cache fits in
+        max_bytes again, and returns how many were deleted.
+        """
+        entries: List[tuple[int, int, str]] = []
+        total = 0
+        try:
+            subdirs = os.scandir(self.directory)
+        except FileNotFoundError:
+            return 0
+        with subdirs:
+            for subdir in subdirs:
+                if not subdir.is_dir():
+                    continue
+                with os.scandir(subdir.path) as files:
+                    for entry in files:
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                        total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
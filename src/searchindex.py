@@ -0,0 +1,162 @@
+"""
+A prebuilt inverted index for client-side search, written next to the pages.
+
+    search/pages.json      [[title, url], ...], indexed by page id (null for removed pages)
+    search/terms-a.json    {"alpha": [0, 4, 7], ...}, every term starting with "a"
+    search/terms-_.json    terms that don't start with a-z or 0-9
+
+A client lowercases the query, splits it into words like tokenize() does,
+fetches only the shards for their first characters and intersects the
+posting lists. search/.state.json holds each page's terms, so an
+incremental build can update just the postings of the pages that changed.
+"""
+import json
+import os
+import re
+import shutil
+from string import ascii_lowercase, digits
+from typing import Dict, List, Self
+
+from atomicwrite import OutputFile
+
+INDEX_DIR = "search"
+PAGES_NAME = "pages.json"
+STATE_NAME = ".state.json"
+STATE_FORMAT = 1
+
+# Words of two or more letters or digits; single characters match too much to be worth indexing
+TERM_PATTERN = re.compile(r"\w{2,}")
+SHARD_CHARACTERS = frozenset(ascii_lowercase + digits)
+
+def tokenize(text: str) -> List[str]:
+    return TERM_PATTERN.findall(text.lower())
+
+def shard_name(term: str) -> str:
+    return f"terms-{term[0] if term[0] in SHARD_CHARACTERS else '_'}.json"
+
+def page_url(basepath: str, output_key: str) -> str:
+    return basepath + output_key.replace(os.sep, "/")
+
+class SearchIndex:
+    """
+    The pages in the index, keyed by output path, and the changes made to
+    them since the index was loaded. save() applies those changes to the
+    posting list shards they touch and leaves every other shard alone.
+    """
+    def __init__(self, pages: Dict[str, dict] = None, loaded: bool = False):
+        # output_key -> {"id": int, "title": str, "url": str, "terms": [str, ...]}
+        self.pages = pages if pages is not None else {}
+        # A fresh index starts from empty shards instead of the files on disk
+        self.loaded = loaded
+        self.next_id = max((entry["id"] for entry in self.pages.values()), default=-1) + 1
+        # (page id, old terms, new terms) for every page added, changed or removed
+        self.changes: List[tuple[int, List[str], List[str]]] = []
+        self.table_changed = not loaded
+
+    @classmethod
+    def load(cls, output_dir: str) -> Self:
+        path = os.path.join(output_dir, INDEX_DIR, STATE_NAME)
+        try:
+            with open(path, "r", encoding="utf8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            # No usable state just means the index is built from scratch
+            return cls()
+        if not isinstance(data, dict) or data.get("format") != STATE_FORMAT:
+            return cls()
+        return cls(data.get("pages", {}), loaded=True)
+
+    def add(self, output_key: str, title: str, url: str, terms: List[str]) -> None:
+        # terms are expected sorted and without duplicates
+        entry = self.pages.get(output_key)
+        if entry is None:
+            entry = {"id": self.next_id, "title": title, "url": url, "terms": []}
+            self.next_id += 1
+            self.pages[output_key] = entry
+            self.table_changed = True
+        elif entry["title"] != title or entry["url"] != url:
+            entry["title"], entry["url"] = title, url
+            self.table_changed = True
+        if entry["terms"] != terms:
+            self.changes.append((entry["id"], entry["terms"], terms))
+            entry["terms"] = terms
+
+    def remove(self, output_key: str) -> None:
+        entry = self.pages.pop(output_key, None)
+        if entry is not None:
+            self.changes.append((entry["id"], entry["terms"], []))
+            self.table_changed = True
+
+    def save(self, output_dir: str) -> dict:
+        """
+        Writes the shards and tables that changed. Returns the output keys of
+        every file the index consists of, and how many shards were rewritten.
+        """
+        index_dir = os.path.join(output_dir, INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+        # shard -> term -> (page ids to drop, page ids to add)
+        edits: Dict[str, Dict[str, tuple[set, set]]] = {}
+        for page_id, old_terms, new_terms in self.changes:
+            old_terms, new_terms = set(old_terms), set(new_terms)
+            for term in old_terms - new_terms:
+                edits.setdefault(shard_name(term), {}).setdefault(term, (set(), set()))[0].add(page_id)
+            for term in new_terms - old_terms:
+                edits.setdefault(shard_name(term), {}).setdefault(term, (set(), set()))[1].add(page_id)
+
+        for shard, term_edits in edits.items():
+            path = os.path.join(index_dir, shard)
+            postings = read_json(path, {}) if self.loaded else {}
+            for term, (dropped, added) in term_edits.items():
+                ids = (set(postings.get(term, ())) - dropped) | added
+                if ids:
+                    postings[term] = sorted(ids)
+                else:
+                    postings.pop(term, None)
+            if postings:
+                write_json(path, dict(sorted(postings.items())))
+            else:
+                remove_file(path)
+
+        if self.table_changed:
+            table: List[list | None] = [None] * self.next_id
+            for entry in self.pages.values():
+                table[entry["id"]] = [entry["title"], entry["url"]]
+            write_json(os.path.join(index_dir, PAGES_NAME), table)
+        if self.changes or self.table_changed:
+            write_json(os.path.join(index_dir, STATE_NAME), {"format": STATE_FORMAT, "pages": self.pages})
+
+        if not self.loaded:
+            # Shards from an older index that nothing was written to this time
+            # no longer have any terms
+            for name in os.listdir(index_dir):
+                if name.startswith("terms-") and name not in edits:
+                    remove_file(os.path.join(index_dir, name))
+        self.loaded = True
+        self.changes = []
+        self.table_changed = False
+        files = [os.path.join(INDEX_DIR, name) for name in sorted(os.listdir(index_dir))]
+        return {"files": files, "shards_written": len(edits)}
+
+def remove_index(output_dir: str) -> None:
+    # For builds that change pages without indexing them: an index left
+    # behind would keep their old postings, and its state would tell the
+    # next indexed build they were already up to date
+    shutil.rmtree(os.path.join(output_dir, INDEX_DIR), ignore_errors=True)
+
+def read_json(path: str, default: object) -> object:
+    try:
+        with open(path, "r", encoding="utf8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path: str, data: object) -> None:
+    # Compact, since clients download these, and only replaced when the bytes differ
+    with OutputFile(path, skip_unchanged=True) as file:
+        json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
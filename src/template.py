@@ -0,0 +1,75 @@
+import os
+import re
+from typing import Dict, Iterable, List, Self, TextIO
+
+# Placeholders look like `{{ Title }}` or `{{ Content }}`
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+
+def rewrite_basepath(html: str, basepath: str) -> str:
+    # Root-relative links and sources have to point below the deployment basepath.
+    # Only the template goes through here; page bodies get their URLs rewritten
+    # as the tree is built (see textnode.with_basepath).
+    if basepath == "/":
+        return html
+    html = html.replace(r'href="/', f'href="{basepath}')
+    return html.replace(r'src="/', f'src="{basepath}')
+
+class Template:
+    """
+    A page template parsed once into literal segments and the slots between
+    them, so filling it in is a single join instead of one replace per slot.
+    """
+    def __init__(self, text: str, basepath: str = "/"):
+        # The template's own static links only need rewriting once, not once per page
+        text = rewrite_basepath(text, basepath)
+        self.segments: List[str] = []
+        self.slots: List[tuple[str, str]] = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.segments.append(text[position:match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.segments.append(text[position:])
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = [self.segments[0]]
+        for (name, placeholder), literal in zip(self.slots, self.segments[1:]):
+            # Unknown placeholders are left in place, like the old replace() chain did
+            parts.append(values.get(name, placeholder))
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(self, file: TextIO, values: Dict[str, str | Iterable[str]]) -> None:
+        """
+        Streams the filled-in template into file. Values can be strings or
+        iterables of chunks (like HTMLNode.iter_html()), which are written as
+        they are produced instead of being joined first.
+        """
+        file.write(self.segments[0])
+        for (name, placeholder), literal in zip(self.slots, self.segments[1:]):
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                file.write(value)
+            else:
+                file.writelines(value)
+            file.write(literal)
+
+    @classmethod
+    def load(cls, path: str, basepath: str = "/") -> Self:
+        with open(path, "r", encoding="utf8") as file:
+            return cls(file.read(), basepath)
+
+# Compiled templates for the lifetime of the process (one build, or one pool worker),
+# keyed by path and basepath and invalidated when the file changes on disk.
+_template_cache: Dict[tuple[str, str], tuple[tuple[int, int], Template]] = {}
+
+def load_template(path: str, basepath: str = "/") -> Template:
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (path, basepath)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    template = Template.load(path, basepath)
+    _template_cache[key] = (version, template)
+    return template
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from atomicwrite import OutputFile, same_content
+
+class TestOutputFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "page.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, text: str, skip_unchanged: bool = True) -> bool:
+        output = OutputFile(self.path, skip_unchanged)
+        with output as out:
+            out.write(text)
+        return output.changed
+
+    def test_writes_new_file(self):
+        self.assertTrue(self.write("<p>new</p>"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>new</p>")
+        self.assertEqual(os.listdir(self.directory), ["page.html"])
+
+    def test_identical_file_is_left_alone(self):
+        self.write("<p>same</p>")
+        os.utime(self.path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertFalse(self.write("<p>same</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(os.listdir(self.directory), ["page.html"])
+
+    def test_changed_file_is_replaced(self):
+        for text in ("<p>one</p>", "<p>two</p>", "<p>longer</p>"):
+            with self.subTest(text=text):
+                self.assertTrue(self.write(text))
+                with open(self.path) as f:
+                    self.assertEqual(f.read(), text)
+
+    def test_plain_mode_always_writes(self):
+        self.write("<p>same</p>", skip_unchanged=False)
+        os.utime(self.path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertTrue(self.write("<p>same</p>", skip_unchanged=False))
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+
+    def test_failure_keeps_old_file(self):
+        self.write("<p>old</p>")
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path, True) as out:
+                out.write("<p>half")
+                raise ValueError("broken block")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>old</p>")
+        self.assertEqual(os.listdir(self.directory), ["page.html"])
+
+    def test_atomic_failure_keeps_old_file(self):
+        self.write("<p>old</p>", skip_unchanged=False)
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path, atomic=True) as out:
+                out.write("<p>half")
+                raise ValueError("broken block")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>old</p>")
+        self.assertEqual(os.listdir(self.directory), ["page.html"])
+
+    def test_atomic_replaces_file(self):
+        self.write("<p>old</p>", skip_unchanged=False)
+        output = OutputFile(self.path, atomic=True)
+        with output as out:
+            out.write("<p>new</p>")
+        self.assertTrue(output.changed)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>new</p>")
+        self.assertEqual(os.listdir(self.directory), ["page.html"])
+
+    def test_failure_removes_partial_file(self):
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path) as out:
+                out.write("<p>half")
+                raise ValueError("broken block")
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_same_content(self):
+        other = os.path.join(self.directory, "other.html")
+        self.write("abc")
+        with open(other, "w") as f:
+            f.write("abd")
+        self.assertFalse(same_content(other, self.path))
+        self.assertFalse(same_content(self.path, os.path.join(self.directory, "missing")))
+        self.assertTrue(same_content(self.path, self.path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+from fastcopy import STRATEGIES, copy_file
+
+TEST_ROOT = Path(__file__).parent / "test_fastcopy_data"
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_ROOT, exist_ok=True)
+        self.src = str(TEST_ROOT / "source.bin")
+        self.dst = str(TEST_ROOT / "target.bin")
+        self.data = bytes(range(256)) * 1024
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+        os.utime(self.src, ns=(1_000_000_000, 1_000_000_000))
+
+    def tearDown(self):
+        shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+    def test_every_strategy_copies_content_and_mtime(self):
+        for strategy in STRATEGIES:
+            with self.subTest(strategy=strategy):
+                used = copy_file(self.src, self.dst, strategy)
+                self.assertIn(used, STRATEGIES)
+                with open(self.dst, "rb") as f:
+                    self.assertEqual(f.read(), self.data)
+                self.assertEqual(os.stat(self.dst).st_mtime_ns, os.stat(self.src).st_mtime_ns)
+
+    def test_copy_strategy_is_plain_copy(self):
+        self.assertEqual(copy_file(self.src, self.dst, "copy"), "copy")
+
+    def test_auto_never_hardlinks(self):
+        copy_file(self.src, self.dst, "auto")
+        self.assertNotEqual(os.stat(self.dst).st_ino, os.stat(self.src).st_ino)
+
+    def test_hardlink_shares_inode(self):
+        used = copy_file(self.src, self.dst, "hardlink")
+        if used == "hardlink":
+            self.assertEqual(os.stat(self.dst).st_ino, os.stat(self.src).st_ino)
+
+    def test_copy_over_hardlink_leaves_source_alone(self):
+        other = str(TEST_ROOT / "other.bin")
+        with open(other, "wb") as f:
+            f.write(b"replacement")
+        copy_file(self.src, self.dst, "hardlink")
+        copy_file(other, self.dst, "auto")
+        with open(self.src, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        with open(self.dst, "rb") as f:
+            self.assertEqual(f.read(), b"replacement")
+
+    def test_empty_file(self):
+        with open(self.src, "wb"):
+            pass
+        copy_file(self.src, self.dst, "auto")
+        self.assertEqual(os.path.getsize(self.dst), 0)
+
+    def test_unknown_strategy_raises(self):
+        with self.assertRaises(ValueError) as context:
+            copy_file(self.src, self.dst, "teleport")
+        self.assertEqual(str(context.exception), "Unknown copy strategy 'teleport'")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from fragments import FragmentCache, fragment_key
+
+
+class TestFragments(unittest.TestCase):
+    def test_key_depends_on_kind_and_text(self):
+        self.assertEqual(fragment_key("paragraph", "text"), fragment_key("paragraph", "text"))
+        self.assertNotEqual(fragment_key("paragraph", "text"), fragment_key("heading", "text"))
+        self.assertNotEqual(fragment_key("paragraph", "text"), fragment_key("paragraph", "other"))
+        self.assertNotEqual(fragment_key("paragraph", "text"), fragment_key("paragraph", "text", "/base/"))
+
+    def test_hits_and_misses(self):
+        cache = FragmentCache(4)
+        self.assertIsNone(cache.get(b"a"))
+        cache.put(b"a", "<p>a</p>")
+        self.assertEqual(cache.get(b"a"), "<p>a</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = FragmentCache(2)
+        cache.put(b"a", "A")
+        cache.put(b"b", "B")
+        cache.get(b"a")
+        cache.put(b"c", "C")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"a"), "A")
+        self.assertEqual(cache.get(b"c"), "C")
+
+    def test_needs_room(self):
+        with self.assertRaises(ValueError):
+            FragmentCache(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import copy
+import pickle
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import EMPTY_PROPS, HTMLNode
+from leafnode import LeafNode
+from md_handler import markdown_to_html_node
 
 
 class TestTextNode(unittest.TestCase):
@@ -43,11 +47,39 @@ class TestTextNode(unittest.TestCase):
         node = HTMLNode("p", "Paragraph", props={"data-index": 5})
         self.assertEqual(node.props_to_html(), ' data-index="5"')
 
+    def test_iter_html_raises_not_implemented(self):
+        node = HTMLNode("div", "Hello")
+        with self.assertRaises(NotImplementedError):
+            list(node.iter_html())
+
     def test_repr_output(self):
         node = HTMLNode("h1", "Title", ["child1"], {"class": "header"})
         expected_repr = "HTMLNode(h1, Title, ['child1'], {'class': 'header'})"
         self.assertEqual(repr(node), expected_repr)
 
+    def test_nodes_without_props_share_empty_props(self):
+        node = HTMLNode("div", "Hello")
+        other = HTMLNode("p", "World")
+        self.assertIs(node.props, other.props)
+        with self.assertRaises(TypeError):
+            node.props["class"] = "container"
+
+    def test_no_instance_dict(self):
+        node = HTMLNode("div", "Hello")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "value"
+
+    def test_pickle_and_deepcopy_round_trip(self):
+        tree = markdown_to_html_node("# Title\n\nSome **bold** and a [link](/about)\n\n- one\n- two")
+        for node in (LeafNode("b", "x"), tree):
+            for restored in (pickle.loads(pickle.dumps(node)), copy.deepcopy(node)):
+                self.assertIsNot(restored, node)
+                self.assertEqual(restored.to_html(), node.to_html())
+        restored = pickle.loads(pickle.dumps(LeafNode("a", "x", {"href": "/"})))
+        self.assertEqual(restored.props, {"href": "/"})
+        self.assertIs(copy.deepcopy(LeafNode("b", "x")).props, EMPTY_PROPS)
+
 
 
 if __name__ == "__main__":
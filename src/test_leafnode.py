@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from leafnode import LeafNode
@@ -51,6 +52,30 @@ class TestTextNode(unittest.TestCase):
         node = LeafNode("p", True)
         self.assertEqual(node.to_html(), "<p>True</p>")
 
+    def test_leaf_write_html(self):
+        out = io.StringIO()
+        LeafNode("a", "Click here", {"href": "https://example.com"}).write_html(out)
+        self.assertEqual(out.getvalue(), '<a href="https://example.com">Click here</a>')
+
+    def test_leaf_trusted_skips_required_props(self):
+        self.assertEqual(LeafNode.trusted("a", "link").to_html(), "<a>link</a>")
+        with self.assertRaises(ValueError):
+            LeafNode("a", "link")
+
+    def test_leaf_trusted_matches_constructor(self):
+        node = LeafNode.trusted("img", "", {"src": "/a.png", "alt": "A"})
+        self.assertEqual(node.to_html(), LeafNode("img", "", {"src": "/a.png", "alt": "A"}).to_html())
+        self.assertIsNone(node.children)
+
+    def test_leaf_trusted_empty_value_raises(self):
+        with self.assertRaises(ValueError) as context:
+            LeafNode.trusted("b", "")
+        self.assertEqual(str(context.exception), "'b' cannot have an empty value.")
+
+    def test_leaf_no_instance_dict(self):
+        node = LeafNode("b", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
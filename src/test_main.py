@@ -1,8 +1,16 @@
+import json
 import os
+import pstats
 import shutil
 import unittest
 from pathlib import Path
-from main import copy_files, clean_dir, publish
+from unittest import mock
+from main import copy_files, clean_dir, generate_page, publish, rebuild_changes, sync_files, watch
+from manifest import BuildManifest
+from manifest import MANIFEST_NAME
+from profiler import PAGE_STAGES, BuildProfile
+from rendercache import RenderCache
+from searchindex import INDEX_DIR
 
 TEST_ROOT = Path(__file__).parent / "test_data"
 INPUT_DIR = TEST_ROOT / "input"
@@ -53,5 +61,464 @@ class TestStaticSiteBuilder(unittest.TestCase):
 
         self.assertTrue((OUTPUT_DIR / "style.css").exists())
 
+    def test_publish_incremental_skips_unchanged_pages(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello World")
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        self.assertEqual(report["rendered"], 1)
+        self.assertTrue((OUTPUT_DIR / MANIFEST_NAME).exists())
+
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertEqual(report["rendered"], 0)
+        self.assertEqual(report["skipped"], 1)
+
+    def test_publish_incremental_rerenders_changed_pages(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello World")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Goodbye World")
+
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertEqual(report["rendered"], 1)
+        with open(OUTPUT_DIR / "index.html") as f:
+            self.assertIn("Goodbye World", f.read())
+
+    def test_publish_incremental_rerenders_on_basepath_change(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello World")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/blog/", incremental=True)
+        self.assertEqual(report["rendered"], 1)
+
+    def test_publish_incremental_removes_deleted_pages(self):
+        os.makedirs(INPUT_DIR / "post", exist_ok=True)
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello World")
+        with open(INPUT_DIR / "post" / "index.md", "w") as f:
+            f.write("# A post")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        self.assertTrue((OUTPUT_DIR / "post" / "index.html").exists())
+
+        shutil.rmtree(INPUT_DIR / "post")
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertEqual(report["removed"], 1)
+        self.assertFalse((OUTPUT_DIR / "post").exists())
+        self.assertTrue((OUTPUT_DIR / "index.html").exists())
+
+    def test_publish_parallel(self):
+        for name in ("one", "two", "three"):
+            os.makedirs(INPUT_DIR / name, exist_ok=True)
+            with open(INPUT_DIR / name / "index.md", "w") as f:
+                f.write(f"# Page {name}")
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), jobs=2)
+        self.assertEqual(report["rendered"], 3)
+        for name in ("one", "two", "three"):
+            with open(OUTPUT_DIR / name / "index.html") as f:
+                self.assertIn(f"Page {name}", f.read())
+
+    def test_publish_reports_failed_pages(self):
+        with open(INPUT_DIR / "good.md", "w") as f:
+            f.write("# Good")
+        with open(INPUT_DIR / "bad.md", "w") as f:
+            f.write("No title here")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                with self.assertRaises(RuntimeError) as context:
+                    publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), jobs=jobs)
+                self.assertIn("bad.md", str(context.exception))
+                self.assertTrue((OUTPUT_DIR / "good.html").exists())
+                self.assertFalse((OUTPUT_DIR / "bad.html").exists())
+
+    def test_publish_profile_matches_normal_output(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello\n\nSome [link](/about) and **bold** text.\n\n- one\n- two")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/")
+        with open(OUTPUT_DIR / "index.html") as f:
+            expected = f.read()
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                profile = BuildProfile(slowest=5)
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", jobs=jobs, profile=profile)
+                self.assertEqual(report["rendered"], 1)
+                with open(OUTPUT_DIR / "index.html") as f:
+                    self.assertEqual(f.read(), expected)
+                self.assertEqual(len(profile.pages), 1)
+                self.assertEqual(profile.pages[0][1], str(INPUT_DIR / "index.md"))
+                for stage in PAGE_STAGES:
+                    self.assertGreater(profile.stages[stage], 0)
+                self.assertGreater(profile.wall, 0)
+
+    def test_publish_profile_dump(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello")
+        dump_file = TEST_ROOT / "render.pstats"
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), jobs=2, profile=BuildProfile(dump_file=str(dump_file)))
+        stats = pstats.Stats(str(dump_file))
+        self.assertTrue(any(function[2] == "generate_page" for function in stats.stats))
+
+    def test_publish_mapped_matches_normal_output(self):
+        pages = {
+            "index.md": "# Hello\n\nSome [link](/about) and **bold** text.\n\n```\ncode\n\nmore\n```\n\n- one\n- two",
+            "crlf.md": "# Windows\r\n\r\nline one\r\nline two\r\n",
+        }
+        for name, text in pages.items():
+            with open(INPUT_DIR / name, "w", newline="") as f:
+                f.write(text)
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/")
+        expected = {name: (OUTPUT_DIR / name.replace(".md", ".html")).read_text() for name in pages}
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", mapped=True)
+        self.assertEqual(report["rendered"], 2)
+        for name in pages:
+            self.assertEqual((OUTPUT_DIR / name.replace(".md", ".html")).read_text(), expected[name])
+
+    def test_generate_page_mapped_failure_keeps_previous_output(self):
+        template = Path(__file__).parent.parent / "template.html"
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        for previous in (None, "<p>previous</p>"):
+            for text in ("", "# Title\n\nfine\n\nbroken **bold"):
+                with self.subTest(previous=previous, text=text):
+                    if previous is not None:
+                        (OUTPUT_DIR / "page.html").write_text(previous)
+                    with open(INPUT_DIR / "page.md", "w") as f:
+                        f.write(text)
+                    with self.assertRaises(ValueError):
+                        generate_page(str(INPUT_DIR / "page.md"), str(template), str(OUTPUT_DIR / "page.html"), "/", mapped=True)
+                    if previous is None:
+                        self.assertFalse((OUTPUT_DIR / "page.html").exists())
+                    else:
+                        self.assertEqual((OUTPUT_DIR / "page.html").read_text(), previous)
+                    self.assertEqual(os.listdir(OUTPUT_DIR), [] if previous is None else ["page.html"])
+
+    def test_publish_fragment_cache_reports_hits(self):
+        for name in ("one", "two", "three"):
+            with open(INPUT_DIR / f"{name}.md", "w") as f:
+                f.write(f"# Page {name}\n\nThe same disclaimer on every page.")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        expected = (OUTPUT_DIR / "one.html").read_text()
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), jobs=jobs, fragment_cache=16)
+                cache = report["fragment_cache"]
+                self.assertEqual(cache["block_hits"] + cache["block_misses"], 6)
+                self.assertGreaterEqual(cache["block_hits"], 1)
+                self.assertEqual((OUTPUT_DIR / "one.html").read_text(), expected)
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        self.assertNotIn("fragment_cache", report)
+
+    def test_publish_basepath_rewrites_links_but_not_code(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write('# Home\n\nSee [about](/about) and ![logo](/logo.png), [out](https://x.org/).\n\n```\n<a href="/raw">\n```\n\nInline `src="/raw"` too.')
+        for jobs, kwargs in ((1, {}), (1, {"mapped": True}), (1, {"profile": BuildProfile()}), (1, {"fragment_cache": 16}), (2, {})):
+            with self.subTest(jobs=jobs, **{key: bool(value) for key, value in kwargs.items()}):
+                publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", jobs=jobs, **kwargs)
+                html = (OUTPUT_DIR / "index.html").read_text()
+                self.assertIn('<a href="/base/about">about</a>', html)
+                self.assertIn('<img src="/base/logo.png" alt="logo" />', html)
+                self.assertIn('<a href="https://x.org/">out</a>', html)
+                self.assertIn('<pre><code><a href="/raw">\n</code></pre>', html)
+                self.assertIn('<code>src="/raw"</code>', html)
+
+    def test_publish_render_cache_reuses_bodies_across_builds(self):
+        for name in ("one", "two"):
+            with open(INPUT_DIR / f"{name}.md", "w") as f:
+                f.write(f"# Page {name}\n\nA [link](/about) on page {name}.")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/")
+        expected = (OUTPUT_DIR / "one.html").read_text()
+        cache = RenderCache(str(TEST_ROOT / "cache"))
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", render_cache=cache)
+        self.assertEqual(report["render_cache"]["misses"], 2)
+        self.assertEqual((OUTPUT_DIR / "one.html").read_text(), expected)
+        # A fresh build, even in parallel, reuses every body
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", jobs=2, render_cache=cache)
+        self.assertEqual(report["render_cache"]["hits"], 2)
+        self.assertEqual(report["render_cache"]["misses"], 0)
+        self.assertEqual((OUTPUT_DIR / "one.html").read_text(), expected)
+        # Bodies are rendered for one basepath, so another one has its own entries
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/", render_cache=cache)
+        self.assertEqual(report["render_cache"]["misses"], 2)
+        self.assertIn('href="/about"', (OUTPUT_DIR / "one.html").read_text())
+
+    def test_publish_keep_unchanged_leaves_identical_files_alone(self):
+        for name in ("one", "two"):
+            with open(INPUT_DIR / f"{name}.md", "w") as f:
+                f.write(f"# Page {name}\n\nText of {name}.")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        with open(OUTPUT_DIR / "stray.html", "w") as f:
+            f.write("left over from an old build")
+        old = 1_000_000_000
+        for name in ("one.html", "two.html", "style.css"):
+            os.utime(OUTPUT_DIR / name, ns=(old, old))
+        os.utime(STATIC_DIR / "style.css", ns=(old, old))
+        with open(INPUT_DIR / "two.md", "w") as f:
+            f.write("# Page two\n\nNew text.")
+        for jobs, kwargs in ((1, {}), (2, {}), (1, {"mapped": True}), (1, {"profile": BuildProfile()})):
+            with self.subTest(jobs=jobs, **{key: bool(value) for key, value in kwargs.items()}):
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), jobs=jobs, keep_unchanged=True, **kwargs)
+                self.assertEqual(report["rendered"], 2)
+                self.assertEqual(os.stat(OUTPUT_DIR / "one.html").st_mtime_ns, old)
+                self.assertEqual(os.stat(OUTPUT_DIR / "style.css").st_mtime_ns, old)
+                self.assertIn("New text.", (OUTPUT_DIR / "two.html").read_text())
+                self.assertFalse((OUTPUT_DIR / "stray.html").exists())
+                self.assertEqual(sorted(os.listdir(OUTPUT_DIR)), [MANIFEST_NAME, "one.html", "style.css", "two.html"])
+        self.assertEqual(report["identical"], 2)
+        self.assertNotIn("identical", publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR)))
+
+    def test_publish_pipeline_matches_normal_output(self):
+        pages = {
+            "index.md": "# Hello\n\nSome [link](/about) and **bold** text.\n\n- one\n- two",
+            "blog/post.md": "# Post\n\n> quoted",
+        }
+        for name, text in pages.items():
+            os.makedirs((INPUT_DIR / name).parent, exist_ok=True)
+            with open(INPUT_DIR / name, "w") as f:
+                f.write(text)
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/")
+        expected = {name: (OUTPUT_DIR / name.replace(".md", ".html")).read_text() for name in pages}
+        for jobs, kwargs in ((1, {}), (2, {}), (1, {"fragment_cache": 16, "keep_unchanged": True})):
+            with self.subTest(jobs=jobs, **kwargs):
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", jobs=jobs, pipeline=2, **kwargs)
+                self.assertEqual(report["rendered"], 2)
+                self.assertEqual(set(report["pipeline"]["stages"]), {"read", "render", "write"})
+                for name in pages:
+                    self.assertEqual((OUTPUT_DIR / name.replace(".md", ".html")).read_text(), expected[name])
+        self.assertEqual(report["identical"], 2)
+        self.assertEqual(report["fragment_cache"]["block_misses"], 5)
+
+    def test_publish_pipeline_reports_failed_pages(self):
+        with open(INPUT_DIR / "good.md", "w") as f:
+            f.write("# Good")
+        with open(INPUT_DIR / "bad.md", "w") as f:
+            f.write("no title")
+        with self.assertRaises(RuntimeError):
+            publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), pipeline=2)
+        self.assertTrue((OUTPUT_DIR / "good.html").exists())
+        self.assertFalse((OUTPUT_DIR / "bad.html").exists())
+        with self.assertRaises(ValueError):
+            publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), pipeline=2, mapped=True)
+
+    def read_index(self, name: str) -> object:
+        with open(OUTPUT_DIR / INDEX_DIR / name, encoding="utf8") as f:
+            return json.load(f)
+
+    def test_publish_search_index(self):
+        pages = {"index.md": "# Home\n\nWelcome to the **site**.", "blog/post.md": "# Post\n\nA [site](/index.html) post."}
+        for name, text in pages.items():
+            os.makedirs((INPUT_DIR / name).parent, exist_ok=True)
+            with open(INPUT_DIR / name, "w") as f:
+                f.write(text)
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", search_index=True)
+        self.assertEqual(report["search_index"]["pages"], 2)
+        table = self.read_index("pages.json")
+        self.assertEqual(sorted(table), [["Home", "/base/index.html"], ["Post", "/base/blog/post.html"]])
+        home = table.index(["Home", "/base/index.html"])
+        post = 1 - home
+        self.assertEqual(self.read_index("terms-s.json"), {"site": sorted([home, post])})
+        self.assertEqual(self.read_index("terms-w.json"), {"welcome": [home]})
+        expected = {name: self.read_index(name) for name in os.listdir(OUTPUT_DIR / INDEX_DIR)}
+
+        # Every way of rendering, and both caches, give the same index
+        cache = RenderCache(str(TEST_ROOT / "cache"))
+        for kwargs in ({"jobs": 2}, {"mapped": True}, {"profile": BuildProfile()}, {"pipeline": 2}, {"fragment_cache": 16, "render_cache": cache}, {"fragment_cache": 16, "render_cache": cache, "keep_unchanged": True}):
+            with self.subTest(**{key: bool(value) for key, value in kwargs.items()}):
+                publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", search_index=True, **kwargs)
+                self.assertEqual({name: self.read_index(name) for name in os.listdir(OUTPUT_DIR / INDEX_DIR)}, expected)
+
+        # An incremental build only touches the shards of the page that changed
+        untouched = OUTPUT_DIR / INDEX_DIR / "terms-w.json"
+        os.utime(untouched, ns=(1_000_000_000, 1_000_000_000))
+        with open(INPUT_DIR / "blog/post.md", "w") as f:
+            f.write("# Post\n\nAn updated post.")
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", incremental=True, search_index=True)
+        self.assertEqual(report["rendered"], 1)
+        self.assertEqual(os.stat(untouched).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(self.read_index("terms-s.json"), {"site": [home]})
+        self.assertEqual(self.read_index("terms-u.json"), {"updated": [post]})
+        os.remove(INPUT_DIR / "blog/post.md")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", incremental=True, search_index=True)
+        self.assertIsNone(self.read_index("pages.json")[post])
+        self.assertFalse((OUTPUT_DIR / INDEX_DIR / "terms-u.json").exists())
+
+    def test_publish_search_index_added_to_incremental_build(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Home\n\nWelcome.")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True, search_index=True)
+        # Unchanged, but rendered once more to get its terms
+        self.assertEqual(report["rendered"], 1)
+        self.assertEqual(self.read_index("terms-w.json"), {"welcome": [0]})
+        self.assertNotIn("search_index", publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True))
+
+    def test_build_without_search_index_drops_stale_index(self):
+        with open(INPUT_DIR / "a.md", "w") as f:
+            f.write("# alpha\n\napple banana")
+        with open(INPUT_DIR / "b.md", "w") as f:
+            f.write("# beta\n\ncherry")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True, search_index=True)
+        # Nothing rendered, so the index is still current and stays
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertTrue((OUTPUT_DIR / INDEX_DIR / "terms-a.json").exists())
+
+        for rebuild in (False, True):
+            with self.subTest(rebuild=rebuild):
+                with open(INPUT_DIR / "a.md", "w") as f:
+                    f.write("# alpha\n\nzebra quokka" if rebuild else "# alpha\n\nyak")
+                if rebuild:
+                    rebuild_changes({str(INPUT_DIR / "a.md")}, set(), str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+                else:
+                    publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+                self.assertFalse((OUTPUT_DIR / INDEX_DIR).exists())
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True, search_index=True)
+                self.assertEqual(report["rendered"], 2)
+                self.assertNotIn("apple", self.read_index("terms-a.json"))
+                self.assertEqual(self.read_index("terms-z.json" if rebuild else "terms-y.json"), {"zebra" if rebuild else "yak": [self.read_index("pages.json").index(["alpha", "/a.html"])]})
+
+    def test_sync_files_copies_only_changed(self):
+        previous, manifest = BuildManifest(), BuildManifest()
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), previous, manifest)
+        self.assertEqual(report["static_copied"], 1)
+        self.assertEqual(manifest.static, {"style.css"})
+
+        mtime = os.stat(OUTPUT_DIR / "style.css").st_mtime_ns
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), manifest, BuildManifest())
+        self.assertEqual(report["static_copied"], 0)
+        self.assertEqual(report["static_unchanged"], 1)
+        self.assertEqual(os.stat(OUTPUT_DIR / "style.css").st_mtime_ns, mtime)
+
+        with open(STATIC_DIR / "style.css", "w") as f:
+            f.write("body { background: #000000; }")
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), manifest, BuildManifest())
+        self.assertEqual(report["static_copied"], 1)
+        with open(OUTPUT_DIR / "style.css") as f:
+            self.assertEqual(f.read(), "body { background: #000000; }")
+
+    def test_sync_files_checksum_ignores_mtime(self):
+        manifest = BuildManifest()
+        sync_files(str(STATIC_DIR), str(OUTPUT_DIR), BuildManifest(), manifest)
+        os.utime(STATIC_DIR / "style.css", ns=(0, 0))
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), manifest, BuildManifest(), checksum=True)
+        self.assertEqual(report["static_unchanged"], 1)
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), manifest, BuildManifest())
+        self.assertEqual(report["static_copied"], 1)
+
+    def test_sync_files_removes_deleted_assets(self):
+        os.makedirs(STATIC_DIR / "images", exist_ok=True)
+        with open(STATIC_DIR / "images" / "a.png", "w") as f:
+            f.write("png")
+        manifest = BuildManifest()
+        sync_files(str(STATIC_DIR), str(OUTPUT_DIR), BuildManifest(), manifest)
+        with open(OUTPUT_DIR / "page.html", "w") as f:
+            f.write("not a static file")
+
+        shutil.rmtree(STATIC_DIR / "images")
+        report = sync_files(str(STATIC_DIR), str(OUTPUT_DIR), manifest, BuildManifest())
+        self.assertEqual(report["static_removed"], 1)
+        self.assertFalse((OUTPUT_DIR / "images").exists())
+        self.assertTrue((OUTPUT_DIR / "page.html").exists())
+
+    def test_publish_incremental_syncs_static(self):
+        with open(INPUT_DIR / "index.md", "w") as f:
+            f.write("# Hello World")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertEqual(report["static_copied"], 0)
+        self.assertEqual(report["static_unchanged"], 1)
+
+    def test_build_flags_are_keyword_only(self):
+        # Neighbouring booleans passed by position could silently trade places
+        for build in (publish, watch):
+            with self.subTest(build=build.__name__):
+                with self.assertRaises(TypeError):
+                    build(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/", False, True)
+        with self.assertRaises(TypeError):
+            rebuild_changes(set(), set(), str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/", False)
+
+    def test_publish_empty_site(self):
+        os.remove(STATIC_DIR / "style.css")
+        os.remove(INPUT_DIR / "sample.txt")
+        for incremental in (False, True, False):
+            with self.subTest(incremental=incremental):
+                report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=incremental)
+                self.assertEqual((report["rendered"], report["static_copied"]), (0, 0))
+                self.assertEqual(os.listdir(OUTPUT_DIR), [MANIFEST_NAME])
+
+    def test_rebuild_changes_touches_only_affected_files(self):
+        for name in ("one", "two"):
+            with open(INPUT_DIR / f"{name}.md", "w") as f:
+                f.write(f"# Page {name}")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+
+        with open(INPUT_DIR / "one.md", "w") as f:
+            f.write("# Page one, edited")
+        os.remove(INPUT_DIR / "two.md")
+        with open(STATIC_DIR / "new.css", "w") as f:
+            f.write("p {}")
+        changed = {str(INPUT_DIR / "one.md"), str(STATIC_DIR / "new.css")}
+        removed = {str(INPUT_DIR / "two.md"), str(STATIC_DIR / "style.css")}
+        os.remove(STATIC_DIR / "style.css")
+
+        report = rebuild_changes(changed, removed, str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        self.assertEqual((report["rendered"], report["removed"]), (1, 1))
+        self.assertEqual((report["static_copied"], report["static_removed"]), (1, 1))
+        with open(OUTPUT_DIR / "one.html") as f:
+            self.assertIn("Page one, edited", f.read())
+        self.assertFalse((OUTPUT_DIR / "two.html").exists())
+        self.assertFalse((OUTPUT_DIR / "style.css").exists())
+        self.assertTrue((OUTPUT_DIR / "new.css").exists())
+
+        # The manifest now matches the sources, so a full incremental pass has nothing to do
+        report = publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), incremental=True)
+        self.assertEqual((report["rendered"], report["removed"], report["static_copied"]), (0, 0, 0))
+
+    def test_rebuild_changes_survives_vanished_files(self):
+        with open(INPUT_DIR / "one.md", "w") as f:
+            f.write("# Page one")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        with open(INPUT_DIR / "one.md", "w") as f:
+            f.write("# Page one, edited")
+        # Seen by the watcher, gone before they could be copied
+        changed = {str(STATIC_DIR / ".style.css.swp"), str(STATIC_DIR / "gone.css"), str(INPUT_DIR / "one.md")}
+        report = rebuild_changes(changed, set(), str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        self.assertEqual((report["failed"], report["rendered"]), (2, 1))
+        with open(OUTPUT_DIR / "one.html") as f:
+            self.assertIn("Page one, edited", f.read())
+
+    def test_watch_starts_despite_broken_pages(self):
+        with open(INPUT_DIR / "good.md", "w") as f:
+            f.write("# Good")
+        with open(INPUT_DIR / "broken.md", "w") as f:
+            f.write("No title yet")
+        with mock.patch("main.Watcher") as watcher, mock.patch("builtins.print"):
+            watcher.return_value.wait_for_changes.side_effect = KeyboardInterrupt
+            with self.assertRaises(KeyboardInterrupt):
+                watch(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR))
+        watcher.return_value.wait_for_changes.assert_called_once()
+        self.assertTrue((OUTPUT_DIR / "good.html").exists())
+
+    def test_rebuild_changes_updates_search_index(self):
+        for name in ("one", "two"):
+            with open(INPUT_DIR / f"{name}.md", "w") as f:
+                f.write(f"# Page {name}\n\nAbout {name}.")
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", search_index=True)
+        one = self.read_index("pages.json").index(["Page one", "/base/one.html"])
+
+        with open(INPUT_DIR / "one.md", "w") as f:
+            f.write("# Page one\n\nEdited.")
+        os.remove(INPUT_DIR / "two.md")
+        cache = RenderCache(str(TEST_ROOT / "cache"))
+        report = rebuild_changes({str(INPUT_DIR / "one.md")}, {str(INPUT_DIR / "two.md")}, str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", fragment_cache=16, render_cache=cache, keep_unchanged=True, search_index=True)
+        self.assertEqual(report["search_index"]["pages"], 1)
+        self.assertEqual((report["render_cache"]["misses"], report["identical"]), (1, 0))
+        self.assertEqual(self.read_index("terms-e.json"), {"edited": [one]})
+        self.assertFalse((OUTPUT_DIR / INDEX_DIR / "terms-t.json").exists())
+        self.assertEqual(self.read_index("pages.json")[1 - one], None)
+
+        # The same terms a full build of the sources indexes; only the page ids differ
+        def shards():
+            return {name: set(self.read_index(name)) for name in os.listdir(OUTPUT_DIR / INDEX_DIR) if name.startswith("terms-")}
+        expected = shards()
+        publish(str(INPUT_DIR), str(STATIC_DIR), str(OUTPUT_DIR), "/base/", search_index=True)
+        self.assertEqual(shards(), expected)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+from manifest import BuildManifest, hash_file, page_inputs_hash
+
+TEST_ROOT = Path(__file__).parent / "test_manifest_data"
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_ROOT, exist_ok=True)
+        self.source = TEST_ROOT / "index.md"
+        with open(self.source, "w") as f:
+            f.write("# Title")
+
+    def tearDown(self):
+        shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+    def test_inputs_hash_depends_on_every_input(self):
+        base = page_inputs_hash("md", "template", "/")
+        self.assertEqual(base, page_inputs_hash("md", "template", "/"))
+        self.assertNotEqual(base, page_inputs_hash("md2", "template", "/"))
+        self.assertNotEqual(base, page_inputs_hash("md", "template2", "/"))
+        self.assertNotEqual(base, page_inputs_hash("md", "template", "/blog/"))
+
+    def test_round_trip(self):
+        manifest = BuildManifest()
+        manifest.record("index.html", str(self.source), "index.md", hash_file(self.source), "abc")
+        manifest.save(str(TEST_ROOT))
+
+        loaded = BuildManifest.load(str(TEST_ROOT))
+        self.assertTrue(loaded.is_current("index.html", "abc"))
+        self.assertFalse(loaded.is_current("index.html", "def"))
+        self.assertFalse(loaded.is_current("other.html", "abc"))
+
+    def test_missing_manifest_is_empty(self):
+        self.assertEqual(BuildManifest.load(str(TEST_ROOT / "nowhere")).pages, {})
+
+    def test_corrupt_manifest_is_empty(self):
+        manifest = BuildManifest()
+        manifest.save(str(TEST_ROOT))
+        with open(TEST_ROOT / ".manifest.json", "w") as f:
+            f.write("{not json")
+        self.assertEqual(BuildManifest.load(str(TEST_ROOT)).pages, {})
+
+    def test_markdown_hash_changes_with_content(self):
+        manifest = BuildManifest()
+        first = manifest.markdown_hash("index.html", str(self.source))
+        manifest.record("index.html", str(self.source), "index.md", first, "abc")
+        self.assertEqual(manifest.markdown_hash("index.html", str(self.source)), first)
+
+        with open(self.source, "w") as f:
+            f.write("# A longer title")
+        self.assertNotEqual(manifest.markdown_hash("index.html", str(self.source)), first)
+
+    def test_stale_outputs(self):
+        manifest = BuildManifest({"a.html": {}, "b.html": {}})
+        self.assertEqual(manifest.stale_outputs({"a.html": {}}), ["b.html"])
+
+if __name__ == "__main__":
+    unittest.main()
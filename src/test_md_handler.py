@@ -1,6 +1,8 @@
 import unittest
+from unittest import mock
+import md_handler
 from textnode import TextNode, TextType
-from md_handler import BlockType, extract_title, markdown_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type
+from md_handler import BlockType, extract_title, markdown_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, lex_blocks, lex_lines, iter_blocks_html, title_from_lines, Block, configure_fragment_cache, fragment_cache_stats, parse_markdown, render_many, RenderResult, collect_terms
 
 class TestMdHandler(unittest.TestCase):
     #region split_nodes_delimiter
@@ -133,6 +135,22 @@ class TestMdHandler(unittest.TestCase):
         ]
 
         self.assertEqual(result, expected)
+
+    def test_many_spans_without_recursion(self):
+        """Tests that thousands of spans in one node don't hit the recursion limit."""
+        text = "x `c` " * 5000
+        nodes = [TextNode(text, TextType.TEXT)]
+        result = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        self.assertEqual(len(result), 10001)
+        self.assertEqual(result[1], TextNode("c", TextType.CODE))
+        self.assertEqual(result[-1], TextNode(" ", TextType.TEXT))
+
+    def test_unmatched_after_many_spans_raises_error(self):
+        """Tests that an unmatched delimiter after valid pairs still raises."""
+        nodes = [TextNode("`a` `b` `c", TextType.TEXT)]
+        with self.assertRaises(ValueError) as context:
+            split_nodes_delimiter(nodes, "`", TextType.CODE)
+        self.assertEqual(str(context.exception), "Invalid Markdown: missing or unmatched delimiters")
         
     #endregion
 
@@ -701,6 +719,28 @@ class TestMdHandler(unittest.TestCase):
             TextNode("![Image](https://example.com/image.jpg)", TextType.LINK, "https://example.com"),
         ]
         self.assertListEqual(new_nodes, expected)
+
+    def test_same_link_text_with_different_spacing(self):
+        """Tests repeated link text where one URL is padded with whitespace."""
+        node = TextNode("[docs]( https://a.com ) then [docs](https://a.com)", TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        expected = [
+            TextNode("docs", TextType.LINK, "https://a.com"),
+            TextNode(" then ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://a.com"),
+        ]
+        self.assertListEqual(new_nodes, expected)
+
+    def test_image_with_padded_url(self):
+        """Tests that whitespace around an image URL doesn't leave the raw markdown behind."""
+        node = TextNode("Pic: ![alt]( https://a.com/p.png )!", TextType.TEXT)
+        new_nodes = split_nodes_image([node])
+        expected = [
+            TextNode("Pic: ", TextType.TEXT),
+            TextNode("alt", TextType.IMAGE, "https://a.com/p.png"),
+            TextNode("!", TextType.TEXT),
+        ]
+        self.assertListEqual(new_nodes, expected)
     #endregion
     
     #region text_to_textnodes
@@ -856,6 +896,54 @@ class TestMdHandler(unittest.TestCase):
         new_nodes = text_to_textnodes(text)
         expected = [TextNode(" ", TextType.TEXT)]
         self.assertListEqual(new_nodes, expected)
+
+    def test_delimiters_inside_link_untouched(self):
+        """Tests that delimiters inside link text and URLs are not treated as formatting."""
+        text = "See [snake_case](https://example.com/a_b) and _this_"
+        new_nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("snake_case", TextType.LINK, "https://example.com/a_b"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("this", TextType.ITALIC),
+        ]
+        self.assertListEqual(new_nodes, expected)
+
+    def test_delimiter_inside_code(self):
+        """Tests that bold and italic markers inside inline code are kept verbatim."""
+        text = "Use `a_b **c**` here"
+        new_nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("Use ", TextType.TEXT),
+            TextNode("a_b **c**", TextType.CODE),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertListEqual(new_nodes, expected)
+
+    def test_italic_inside_bold(self):
+        """Tests that underscores inside a bold span stay part of the bold text."""
+        text = "**bold_with_underscores** and _it_"
+        new_nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("bold_with_underscores", TextType.BOLD),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("it", TextType.ITALIC),
+        ]
+        self.assertListEqual(new_nodes, expected)
+
+    def test_bold_cannot_span_code(self):
+        """Tests that a bold span can't reach across inline code, like the multi-pass pipeline."""
+        text = "**bold `code` bold**"
+        with self.assertRaises(ValueError) as context:
+            text_to_textnodes(text)
+        self.assertEqual(str(context.exception), "Invalid Markdown: missing or unmatched delimiters")
+
+    def test_many_spans(self):
+        """Tests a long run of inline code spans."""
+        text = " ".join(f"`c{i}`" for i in range(2000))
+        new_nodes = text_to_textnodes(text)
+        self.assertEqual(len(new_nodes), 3999)
+        self.assertEqual(new_nodes[-1], TextNode("c1999", TextType.CODE))
     #endregion
     
     #region markdown_to_blocks
@@ -994,6 +1082,61 @@ This is the same paragraph on a new line
             "Third block.",
         ]
         self.assertListEqual(result, expected)
+
+    def test_code_block_with_blank_lines(self):
+        """Tests that blank lines inside a fenced code block don't split it."""
+        markdown = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        result = markdown_to_blocks(markdown)
+        expected = ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"]
+        self.assertListEqual(result, expected)
+
+    def test_whitespace_only_line_separates_blocks(self):
+        """Tests that a line of only spaces counts as a blank line."""
+        markdown = "First block.\n   \nSecond block."
+        result = markdown_to_blocks(markdown)
+        self.assertListEqual(result, ["First block.", "Second block."])
+    #endregion
+
+    #region lex_blocks
+    def test_lex_blocks_types_and_lines(self):
+        """Tests that the lexer yields typed blocks with their lines split out."""
+        markdown = "# Title\n\n- one\n- two\n\n1. a\n2. b\n\n> quote\n\ntext\nmore"
+        result = list(lex_blocks(markdown))
+        expected = [
+            Block(BlockType.HEADING, ["# Title"]),
+            Block(BlockType.UNORDERED_LIST, ["- one", "- two"]),
+            Block(BlockType.ORDERED_LIST, ["1. a", "2. b"]),
+            Block(BlockType.QUOTE, ["> quote"]),
+            Block(BlockType.PARAGRAPH, ["text", "more"]),
+        ]
+        self.assertListEqual(result, expected)
+
+    def test_lex_blocks_unclosed_fence_falls_back(self):
+        """Tests that a fence without a closing line is lexed like any other block."""
+        markdown = "```\nnot code\n\nstill not code"
+        result = list(lex_blocks(markdown))
+        expected = [
+            Block(BlockType.PARAGRAPH, ["```", "not code"]),
+            Block(BlockType.PARAGRAPH, ["still not code"]),
+        ]
+        self.assertListEqual(result, expected)
+
+    def test_lex_blocks_many_unclosed_fences(self):
+        """Tests that many unclosed fences don't make lexing quadratic."""
+        markdown = "```\ntext\n\n" * 20000
+        result = list(lex_blocks(markdown))
+        self.assertEqual(len(result), 20000)
+        self.assertTrue(all(block.block_type is BlockType.PARAGRAPH for block in result))
+    def test_lex_lines_consumes_lazily(self):
+        """Tests that the lexer yields each block before reading past it."""
+        consumed = []
+        def lines():
+            for line in ["# Title", "", "text", "", "more"]:
+                consumed.append(line)
+                yield line
+        blocks = lex_lines(lines())
+        self.assertEqual(next(blocks), Block(BlockType.HEADING, ["# Title"]))
+        self.assertEqual(consumed, ["# Title", ""])
     #endregion
 
     #region block_to_block_type
@@ -1108,6 +1251,13 @@ the **same** even with inline stuff
         )
         self.assertEqual(html, expected)
 
+    def test_codeblock_with_blank_lines(self):
+        """Tests that a fenced code block keeps its blank lines and renders as one block."""
+        md = "```\ndef a():\n    pass\n\n\ndef b():\n    pass\n```"
+        html = markdown_to_html_node(md).to_html()
+        expected = "<div><pre><code>def a():\n    pass\n\n\ndef b():\n    pass\n</code></pre></div>"
+        self.assertEqual(html, expected)
+
     def test_minimal_paragraph(self):
         """Tests a single short paragraph."""
         md = "Just one line."
@@ -1208,6 +1358,175 @@ the **same** even with inline stuff
     
     #endregion
 
+    #region iter_blocks_html
+    def test_iter_blocks_html_matches_tree(self):
+        """Tests that streaming blocks gives the same markup as the full tree."""
+        md = "# Title\n\nSome **bold** text\n\n```\ncode\n\nmore\n```\n\n- a\n- b"
+        self.assertEqual("".join(iter_blocks_html(lex_blocks(md))), markdown_to_html_node(md).to_html())
+
+    def test_basepath_rewrites_links_only(self):
+        """Tests that the basepath applies to link and image URLs but not to code."""
+        md = '# T\n\n[a](/a) ![i](/i.png) `href="/c"`\n\n- [b](/b)\n\n```\nsrc="/d"\n```'
+        expected = '<div><h1>T</h1><p><a href="/base/a">a</a> <img src="/base/i.png" alt="i" /> <code>href="/c"</code></p><ul><li><a href="/base/b">b</a></li></ul><pre><code>src="/d"\n</code></pre></div>'
+        self.assertEqual(markdown_to_html_node(md, "/base/").to_html(), expected)
+        self.assertEqual("".join(iter_blocks_html(lex_blocks(md), "/base/")), expected)
+        configure_fragment_cache(16, 16)
+        try:
+            # Cached fragments are kept apart per basepath
+            self.assertEqual(markdown_to_html_node(md, "/base/").to_html(), expected)
+            self.assertIn('href="/a"', markdown_to_html_node(md).to_html())
+        finally:
+            configure_fragment_cache(0, 0)
+    #endregion
+
+    #region fragment cache
+    def test_fragment_cache_same_output(self):
+        """Tests that cached fragments render exactly like freshly parsed ones."""
+        md = "# Title\n\nSee **this**.\n\n- [a](/a)\n- [b](/b)\n\n```\ncode\n```\n\nSee **this**."
+        expected = markdown_to_html_node(md).to_html()
+        configure_fragment_cache(16, 16)
+        try:
+            first = markdown_to_html_node(md).to_html()
+            second = markdown_to_html_node(md).to_html()
+            stats = fragment_cache_stats()
+        finally:
+            configure_fragment_cache(0, 0)
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        # The repeated paragraph hits on the first render already
+        self.assertEqual(stats["block_misses"], 4)
+        self.assertEqual(stats["block_hits"], 6)
+        self.assertEqual(stats["inline_misses"], 2)
+
+    def test_fragment_cache_list_items(self):
+        """Tests that list items repeated in different lists come from the cache."""
+        configure_fragment_cache(16, 16)
+        try:
+            html = markdown_to_html_node("# T\n\n- shared\n- one\n\n1. shared\n2. two").to_html()
+            stats = fragment_cache_stats()
+        finally:
+            configure_fragment_cache(0, 0)
+        self.assertEqual(html, "<div><h1>T</h1><ul><li>shared</li><li>one</li></ul><ol><li>shared</li><li>two</li></ol></div>")
+        self.assertEqual(stats["inline_hits"], 1)
+
+    def test_fragment_cache_keeps_errors(self):
+        """Tests that malformed blocks raise the same errors with the cache on."""
+        configure_fragment_cache(16, 16)
+        try:
+            for _ in range(2):
+                with self.assertRaises(ValueError) as context:
+                    markdown_to_html_node("# T\n\n- \n- b")
+                self.assertEqual(str(context.exception), "ParentNode must have child nodes")
+                with self.assertRaises(ValueError):
+                    markdown_to_html_node("broken **bold")
+        finally:
+            configure_fragment_cache(0, 0)
+
+    def test_collect_terms(self):
+        """Tests that search terms come from the inline text, with or without cached fragments."""
+        md = "# The Title\n\nSome **Bold** [link text](/url) ![alt words](/img.png) `code`\n\n- item one\n- item one\n\n```\nfenced\n```"
+        expected = {"the", "title", "some", "bold", "link", "text", "code", "item", "one"}
+        with collect_terms() as terms:
+            html = markdown_to_html_node(md).to_html()
+        self.assertEqual(terms, expected)
+        configure_fragment_cache(16, 16)
+        try:
+            # Fill the caches without collecting, then with, then from the cache
+            markdown_to_html_node(md)
+            for _ in range(2):
+                with collect_terms() as terms:
+                    self.assertEqual(markdown_to_html_node(md).to_html(), html)
+                self.assertEqual(terms, expected)
+            with collect_terms() as outer:
+                with collect_terms() as inner:
+                    markdown_to_html_node("Nested words")
+            self.assertEqual(inner, {"nested", "words"})
+            self.assertEqual(outer, {"nested", "words"})
+        finally:
+            configure_fragment_cache(0, 0)
+
+    def test_fragment_cache_off_by_default(self):
+        self.assertEqual(set(fragment_cache_stats().values()), {0})
+    #endregion
+
+    #region parse_markdown
+    def test_parse_markdown_metadata(self):
+        """Tests that the tree comes with title, summary, word count and outline."""
+        md = "Intro with [a link](/x) and ![pic](/p.png).\n\n# The _Title_\n\n## Part **one**\n\n- two words\n1. not a list\n\n> quoted text\n\n- list item\n- more\n\n```\nnot counted\n```\n\n### Part two"
+        page = parse_markdown(md, "/base/")
+        self.assertEqual(page.root.to_html(), markdown_to_html_node(md, "/base/").to_html())
+        self.assertEqual(page.title, "The _Title_")
+        self.assertEqual(page.summary, "Intro with a link and .")
+        self.assertEqual(page.outline, [(1, "The Title"), (2, "Part one"), (3, "Part two")])
+        # A mixed block is a paragraph, so its "-" and "1." are words too
+        self.assertEqual(page.word_count, 6 + 2 + 2 + 7 + 2 + 3 + 2)
+
+    def test_parse_markdown_without_paragraphs(self):
+        page = parse_markdown("# Only a title")
+        self.assertIsNone(page.summary)
+        self.assertEqual(page.word_count, 3)
+
+    def test_parse_markdown_title_errors(self):
+        """Tests that parse_markdown raises the same errors as extract_title."""
+        for md in ("", "No title here", "  # Indented is not a title"):
+            with self.subTest(md=md):
+                with self.assertRaises(ValueError) as expected:
+                    extract_title(md)
+                with self.assertRaises(ValueError) as context:
+                    parse_markdown(md)
+                self.assertEqual(str(context.exception), str(expected.exception))
+
+    def test_parse_markdown_tokenizes_each_run_once(self):
+        """Tests that the outline and summary come from the inline pass that builds the tree."""
+        md = "# Title\n\nFirst **para**\n\nSecond para\n\n## Part [one](/one)\nand more\n\n- item"
+        with mock.patch.object(md_handler, "text_to_textnodes", wraps=md_handler.text_to_textnodes) as scan:
+            page = parse_markdown(md)
+        self.assertEqual(scan.call_count, 5)
+        self.assertEqual(page.summary, "First para")
+        # A multi-line heading reads like it renders, with its lines joined
+        self.assertEqual(page.outline, [(1, "Title"), (2, "Part one and more")])
+
+    def test_parse_markdown_with_fragment_cache(self):
+        """Tests that blocks served from the fragment cache still get their metadata."""
+        md = "# Title\n\nFirst **para**\n\n## Part [one](/one)\nand more"
+        expected = parse_markdown(md)
+        configure_fragment_cache(16, 16)
+        try:
+            for _ in range(2):
+                page = parse_markdown(md)
+                self.assertEqual(page.root.to_html(), expected.root.to_html())
+                self.assertEqual(page[1:], expected[1:])
+        finally:
+            configure_fragment_cache(0, 0)
+    #endregion
+
+    #region render_many
+    def test_render_many(self):
+        """Tests that a batch renders like single documents, in order, with errors kept per item."""
+        documents = ["Some **bold** snippet", "broken **bold", "- [a](/a)\n- b", ""] * 5
+        for jobs, chunksize in ((1, 64), (2, 3)):
+            with self.subTest(jobs=jobs, chunksize=chunksize):
+                results = list(render_many(iter(documents), jobs, chunksize, "/base/"))
+                self.assertEqual(len(results), len(documents))
+                self.assertEqual(results[0], RenderResult("<div><p>Some <b>bold</b> snippet</p></div>", None))
+                self.assertIsNone(results[1].html)
+                self.assertTrue(results[1].error.startswith("ValueError: "))
+                self.assertEqual(results[2].html, markdown_to_html_node(documents[2], "/base/").to_html())
+                # Errors are the ones markdown_to_html_node raises
+                self.assertEqual(results[3], RenderResult(None, "ValueError: ParentNode must have child nodes"))
+                self.assertEqual(results[4:], results[:-4])
+
+    def test_render_many_empty(self):
+        self.assertEqual(list(render_many([], jobs=2)), [])
+
+    def test_render_many_zero_jobs_uses_every_core(self):
+        documents = ["Some **bold** snippet", "broken **bold"] * 3
+        expected = list(render_many(documents))
+        for jobs in (0, -1):
+            with self.subTest(jobs=jobs):
+                self.assertEqual(list(render_many(documents, jobs, 2)), expected)
+    #endregion
+
     #region extract_title
     def test_basic_title(self):
         """Tests extracting a basic title from the first line."""
@@ -1252,6 +1571,12 @@ the **same** even with inline stuff
         markdown = "# Welcome to **My Site**"
         self.assertEqual(extract_title(markdown), "Welcome to **My Site**")
 
+    def test_title_from_lines_stops_at_title(self):
+        """Tests that lines after the title are never read."""
+        lines = iter(["intro", "# Title", "rest"])
+        self.assertEqual(title_from_lines(lines), "Title")
+        self.assertEqual(list(lines), ["rest"])
+
     #endregion
 
 if __name__ == "__main__":
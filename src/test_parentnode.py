@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -95,5 +96,40 @@ class TestTextNode(unittest.TestCase):
         )
 
 
+    def test_iter_html_matches_to_html(self):
+        """Tests that streaming yields the same markup as to_html, in several chunks."""
+        parent = ParentNode("section", [
+            LeafNode("p", "Paragraph 1"),
+            ParentNode("div", [LeafNode("span", "Inside div")], {"class": "box"}),
+        ])
+        chunks = list(parent.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), parent.to_html())
+
+    def test_write_html(self):
+        """Tests that write_html streams the serialized tree into a file object."""
+        parent = ParentNode("div", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        out = io.StringIO()
+        parent.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><b>bold</b> text</div>")
+
+    def test_trusted(self):
+        """Tests that the trusted constructor builds the same node as the public one."""
+        children = [LeafNode("b", "bold"), LeafNode(None, " text")]
+        node = ParentNode.trusted("p", children)
+        self.assertEqual(node.to_html(), ParentNode("p", children).to_html())
+        self.assertEqual(node.props, {})
+
+    def test_trusted_without_children_raises(self):
+        """Tests that the trusted constructor still rejects empty children."""
+        with self.assertRaises(ValueError) as context:
+            ParentNode.trusted("li", [])
+        self.assertEqual(str(context.exception), "ParentNode must have child nodes")
+
+    def test_no_instance_dict(self):
+        """Tests that ParentNode keeps the slotted layout of HTMLNode."""
+        parent = ParentNode("div", [LeafNode("b", "bold")])
+        self.assertFalse(hasattr(parent, "__dict__"))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import time
+import unittest
+from md_handler import extract_markdown_images, extract_markdown_links, text_to_textnodes
+
+# Inputs that made the old backtracking link/image regexes go quadratic (or
+# worse): lots of `[` and `(` that almost, but never quite, form a link.
+PATHOLOGICAL_CORPUS = {
+    "open_brackets": lambda n: "[" * n,
+    "open_image_markers": lambda n: "![" * n,
+    "bracket_then_paren": lambda n: "[a](" * n,
+    "closed_brackets_no_url": lambda n: "[a]" * n,
+    "unclosed_urls": lambda n: "[a](b" * n,
+    "unclosed_nested_parens": lambda n: "[a](b(c)" * n,
+    "spaces_in_urls": lambda n: "[a]( b c" * n,
+    "brackets_inside_urls": lambda n: "[a](x(y)]" * n,
+    "deep_nesting": lambda n: "[" * n + "a" + "]" * (n - 1) + "(b",
+    "long_padding": lambda n: "[a](b" + " " * n + "[c](d" + " " * n,
+}
+
+# Text that is valid markdown, just a lot of it
+DENSE_CORPUS = {
+    "many_links": lambda n: "see [link](https://example.com/a_(b)) and " * n,
+    "many_images": lambda n: "![alt [x]](https://example.com/i.png) " * n,
+    "many_code_spans": lambda n: "x `code` " * n,
+}
+
+BASE_SIZE = 1000
+REPEATS = 3
+# Doubling the input twice should cost ~4x for linear code and ~16x for
+# quadratic code; leave plenty of room for timer noise in between.
+MAX_GROWTH = 8.0
+
+def best_time(function, text: str) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+class TestLinearScaling(unittest.TestCase):
+    def assert_linear(self, function, corpus: dict) -> None:
+        for name, make in corpus.items():
+            with self.subTest(input=name):
+                small_text, large_text = make(BASE_SIZE), make(BASE_SIZE * 4)
+                # Re-measure a couple of times before failing, in case the machine was busy
+                for _ in range(3):
+                    small = best_time(function, small_text)
+                    large = best_time(function, large_text)
+                    # Ignore inputs too fast to time meaningfully
+                    growth = large / max(small, 1e-4)
+                    if growth < MAX_GROWTH:
+                        break
+                self.assertLess(growth, MAX_GROWTH, f"{name}: {small:.5f}s -> {large:.5f}s")
+
+    def test_extract_links_pathological(self):
+        self.assert_linear(extract_markdown_links, PATHOLOGICAL_CORPUS)
+
+    def test_extract_images_pathological(self):
+        self.assert_linear(extract_markdown_images, PATHOLOGICAL_CORPUS)
+
+    def test_text_to_textnodes_pathological(self):
+        self.assert_linear(text_to_textnodes, PATHOLOGICAL_CORPUS)
+
+    def test_text_to_textnodes_dense(self):
+        self.assert_linear(text_to_textnodes, DENSE_CORPUS)
+
+    def test_deep_nesting_result(self):
+        self.assertEqual(extract_markdown_links("[" * 1000 + "a" + "]" * 1000 + "(b)"), [("[" * 999 + "a" + "]" * 999, "b")])
+
+if __name__ == "__main__":
+    unittest.main()
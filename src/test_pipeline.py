@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+from pipeline import PipelineItem, run_pipeline
+
+def read(task: int) -> int:
+    if task == 3:
+        raise OSError("unreadable")
+    return task * 10
+
+def render(task: int, data: int) -> tuple[str, int]:
+    if task == 5:
+        raise ValueError("broken markdown")
+    return f"page {data}", task
+
+class TestPipeline(unittest.TestCase):
+    def test_every_task_comes_out(self):
+        written = {}
+        def write(task: int, output: str) -> bool:
+            written[task] = output
+            return True
+        items, stats = run_pipeline(range(20), read, render, write, io_workers=4, queue_size=2)
+        self.assertEqual(len(items), 20)
+        self.assertEqual(sorted(item.task for item in items), list(range(20)))
+        self.assertEqual(written[7], "page 70")
+        by_task = {item.task: item for item in items}
+        self.assertEqual(by_task[7], PipelineItem(7, 7, True, None))
+        self.assertEqual(by_task[3].error, "OSError: unreadable")
+        self.assertEqual(by_task[5].error, "ValueError: broken markdown")
+        self.assertNotIn(3, written)
+        self.assertNotIn(5, written)
+
+    def test_write_errors_keep_render_info(self):
+        def write(task: int, output: str) -> bool:
+            raise PermissionError("read-only")
+        items, _ = run_pipeline([1], read, render, write)
+        self.assertEqual(items, [PipelineItem(1, 1, None, "PermissionError: read-only")])
+
+    def test_io_overlaps(self):
+        # Slow reads on several threads take about as long as one of them
+        active = []
+        peak = []
+        lock = threading.Lock()
+        def slow_read(task: int) -> int:
+            with lock:
+                active.append(task)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(task)
+            return task
+        items, stats = run_pipeline(range(8), slow_read, render, lambda task, output: True, io_workers=8)
+        self.assertEqual(len(items), 8)
+        self.assertGreater(max(peak), 1)
+        self.assertLess(stats["wall"], 8 * 0.05)
+
+    def test_stats(self):
+        items, stats = run_pipeline(range(10), lambda task: task, render, lambda task, output: True, io_workers=2, queue_size=3)
+        self.assertEqual(set(stats["stages"]), {"read", "render", "write"})
+        self.assertEqual(stats["stages"]["read"]["workers"], 2)
+        self.assertEqual(stats["stages"]["render"]["workers"], 1)
+        for stage in stats["stages"].values():
+            self.assertGreaterEqual(stage["utilization"], 0.0)
+        for queue in stats["queues"].values():
+            self.assertEqual(queue["capacity"], 3)
+            self.assertLessEqual(queue["max"], 3)
+            self.assertLessEqual(queue["mean"], queue["max"])
+
+    def test_no_tasks(self):
+        items, stats = run_pipeline([], read, render, lambda task, output: True)
+        self.assertEqual(items, [])
+        self.assertEqual(stats["queues"]["render"]["max"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
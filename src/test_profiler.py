@@ -0,0 +1,46 @@
+import unittest
+
+from profiler import PAGE_STAGES, STAGES, BuildProfile, timed
+
+
+class TestProfiler(unittest.TestCase):
+    def test_timed_accumulates(self):
+        timings = {}
+        with timed(timings, "read"):
+            pass
+        first = timings["read"]
+        with timed(timings, "read"):
+            pass
+        self.assertGreaterEqual(timings["read"], first)
+        self.assertEqual(list(timings), ["read"])
+
+    def test_timed_records_on_error(self):
+        timings = {}
+        with self.assertRaises(ValueError):
+            with timed(timings, "write"):
+                raise ValueError("boom")
+        self.assertIn("write", timings)
+
+    def test_add_page_sums_stages(self):
+        profile = BuildProfile()
+        profile.add_page("a.md", 10, 20, {"read": 0.5, "write": 0.25})
+        profile.add_page("b.md", 30, 40, {"read": 0.25})
+        self.assertEqual(profile.stages["read"], 0.75)
+        self.assertEqual(profile.stages["write"], 0.25)
+        self.assertEqual(profile.pages[0], (0.75, "a.md", 10, 20))
+
+    def test_slowest_pages(self):
+        profile = BuildProfile(slowest=2)
+        for index, seconds in enumerate([0.1, 0.4, 0.2, 0.3]):
+            profile.add_page(f"{index}.md", 1, 1, {"read": seconds})
+        self.assertEqual([page[1] for page in profile.slowest_pages()], ["1.md", "3.md"])
+
+    def test_page_stages_are_build_stages(self):
+        self.assertEqual(STAGES[-len(PAGE_STAGES):], PAGE_STAGES)
+
+    def test_no_profiler_without_dump_file(self):
+        self.assertIsNone(BuildProfile().profiler)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import rendercache
+from rendercache import RenderCache, renderer_hash
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = RenderCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(self.cache.key("# Title")))
+
+    def test_put_get_round_trip(self):
+        key = self.cache.key("# Title\n\ntext")
+        body = "<div><h1>Title</h1>\r\n<p>text\n</p></div>"
+        self.cache.put(key, "Title", body)
+        self.assertEqual(self.cache.get(key), ("Title", body, None))
+        # Shared with other processes through the directory alone
+        self.assertEqual(RenderCache(self.directory).get(key), ("Title", body, None))
+
+    def test_put_get_terms(self):
+        for terms in (["text", "title"], []):
+            with self.subTest(terms=terms):
+                key = self.cache.key(f"# Title\n\n{terms}")
+                self.cache.put(key, "Title", "<p>text</p>", terms)
+                self.assertEqual(self.cache.get(key), ("Title", "<p>text</p>", terms))
+
+    def test_key_depends_on_markdown_and_renderer(self):
+        key = self.cache.key("# Title")
+        self.assertEqual(key, self.cache.key("# Title"))
+        self.assertNotEqual(key, self.cache.key("# Other"))
+        with mock.patch.object(rendercache, "_renderer_hash", "0" * 64):
+            self.assertNotEqual(key, self.cache.key("# Title"))
+
+    def test_renderer_hash_is_stable(self):
+        self.assertEqual(renderer_hash(), renderer_hash())
+        self.assertEqual(len(renderer_hash()), 64)
+
+    def test_renderer_hash_covers_the_tokenizer(self):
+        # Entries store search terms, so a tokenizer change has to miss too
+        self.assertIn("searchindex.py", rendercache.RENDERER_MODULES)
+        for name in rendercache.RENDERER_MODULES:
+            self.assertTrue(os.path.isfile(os.path.join(rendercache.SCRIPT_DIR, name)), name)
+
+    def test_prune_drops_least_recently_used(self):
+        keys = [self.cache.key(f"# Page {index}") for index in range(4)]
+        for age, key in enumerate(keys):
+            self.cache.put(key, "Title", "x" * 100)
+            path = self.cache._path(key)
+            os.utime(path, (1000 + age, 1000 + age))
+        # Reading an entry makes it the most recently used
+        self.cache.get(keys[0])
+        pruner = RenderCache(self.directory, max_bytes=250)
+        self.assertEqual(pruner.prune(), 2)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNone(self.cache.get(keys[2]))
+        self.assertIsNotNone(self.cache.get(keys[3]))
+
+    def test_prune_missing_directory(self):
+        self.assertEqual(RenderCache(os.path.join(self.directory, "missing")).prune(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
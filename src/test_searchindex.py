@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from searchindex import INDEX_DIR, SearchIndex, page_url, shard_name, tokenize
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.index_dir = os.path.join(self.output_dir, INDEX_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def read(self, name: str) -> object:
+        with open(os.path.join(self.index_dir, name), encoding="utf8") as f:
+            return json.load(f)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Static-site GENERATOR, a 2nd déjà vu!"), ["static", "site", "generator", "2nd", "déjà", "vu"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("alpha"), "terms-a.json")
+        self.assertEqual(shard_name("2nd"), "terms-2.json")
+        self.assertEqual(shard_name("déjà"), "terms-d.json")
+        self.assertEqual(shard_name("éclair"), "terms-_.json")
+        self.assertEqual(shard_name("__init__"), "terms-_.json")
+
+    def test_page_url(self):
+        self.assertEqual(page_url("/base/", os.path.join("blog", "post.html")), "/base/blog/post.html")
+
+    def test_save_writes_shards_and_pages(self):
+        index = SearchIndex()
+        index.add("index.html", "Home", "/index.html", ["alpha", "beta"])
+        index.add("about.html", "About", "/about.html", ["alpha", "gamma"])
+        saved = index.save(self.output_dir)
+        self.assertEqual(saved["shards_written"], 3)
+        self.assertEqual(self.read("pages.json"), [["Home", "/index.html"], ["About", "/about.html"]])
+        self.assertEqual(self.read("terms-a.json"), {"alpha": [0, 1]})
+        self.assertEqual(self.read("terms-g.json"), {"gamma": [1]})
+        self.assertEqual(saved["files"], [os.path.join(INDEX_DIR, name) for name in (".state.json", "pages.json", "terms-a.json", "terms-b.json", "terms-g.json")])
+
+    def test_incremental_update_touches_only_changed_shards(self):
+        index = SearchIndex()
+        index.add("index.html", "Home", "/index.html", ["alpha", "beta"])
+        index.add("about.html", "About", "/about.html", ["alpha", "gamma"])
+        index.save(self.output_dir)
+        untouched = os.path.join(self.index_dir, "terms-b.json")
+        os.utime(untouched, ns=(1_000_000_000, 1_000_000_000))
+
+        index = SearchIndex.load(self.output_dir)
+        self.assertTrue(index.loaded)
+        index.add("about.html", "About", "/about.html", ["alpha", "delta"])
+        index.add("index.html", "Home", "/index.html", ["alpha", "beta"])
+        saved = index.save(self.output_dir)
+        self.assertEqual(saved["shards_written"], 2)
+        self.assertEqual(os.stat(untouched).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(self.read("terms-d.json"), {"delta": [1]})
+        self.assertFalse(os.path.exists(os.path.join(self.index_dir, "terms-g.json")))
+
+        index = SearchIndex.load(self.output_dir)
+        index.remove("index.html")
+        index.add("new.html", "New", "/new.html", ["beta"])
+        index.save(self.output_dir)
+        # Ids aren't reused until the index is rebuilt from scratch
+        self.assertEqual(self.read("pages.json"), [None, ["About", "/about.html"], ["New", "/new.html"]])
+        self.assertEqual(self.read("terms-a.json"), {"alpha": [1]})
+        self.assertEqual(self.read("terms-b.json"), {"beta": [2]})
+
+    def test_fresh_index_drops_old_shards(self):
+        index = SearchIndex()
+        index.add("index.html", "Home", "/index.html", ["alpha", "zeta"])
+        index.save(self.output_dir)
+        index = SearchIndex()
+        index.add("index.html", "Home", "/index.html", ["alpha"])
+        saved = index.save(self.output_dir)
+        self.assertNotIn(os.path.join(INDEX_DIR, "terms-z.json"), saved["files"])
+        self.assertFalse(os.path.exists(os.path.join(self.index_dir, "terms-z.json")))
+
+    def test_load_without_state(self):
+        index = SearchIndex.load(self.output_dir)
+        self.assertFalse(index.loaded)
+        self.assertEqual(index.pages, {})
+
+if __name__ == "__main__":
+    unittest.main()
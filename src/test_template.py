@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import unittest
+from pathlib import Path
+from template import Template, load_template, rewrite_basepath
+
+TEST_ROOT = Path(__file__).parent / "test_template_data"
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>Body</p>"}),
+            "<title>Hi</title><main><p>Body</p></main>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "x"}), "x|x")
+
+    def test_unknown_slot_left_in_place(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render({"Title": "x"}), "x {{ Author }}")
+
+    def test_values_are_not_rescanned(self):
+        template = Template("{{ Title }}{{ Content }}")
+        self.assertEqual(template.render({"Title": "{{ Content }}", "Content": "c"}), "{{ Content }}c")
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({"Title": "x"}), "<p>static</p>")
+
+    def test_write_streams_chunks(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>{{ Other }}")
+        out = io.StringIO()
+        template.write(out, {"Title": "Hi", "Content": iter(["<p>", "Body", "</p>"])})
+        self.assertEqual(out.getvalue(), "<title>Hi</title><main><p>Body</p></main>{{ Other }}")
+
+    def test_basepath_applied_at_compile_time(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/blog/")
+        self.assertEqual(
+            template.render({"Content": '<a href="/x">x</a>'}),
+            '<link href="/blog/index.css" /><img src="/blog/a.png" /><a href="/x">x</a>',
+        )
+
+    def test_rewrite_basepath(self):
+        self.assertEqual(rewrite_basepath('<a href="/a">', "/b/"), '<a href="/b/a">')
+        self.assertEqual(rewrite_basepath('<a href="https://x/">', "/b/"), '<a href="https://x/">')
+        self.assertEqual(rewrite_basepath('<a href="/a">', "/"), '<a href="/a">')
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_ROOT, exist_ok=True)
+        self.path = str(TEST_ROOT / "template.html")
+        with open(self.path, "w") as f:
+            f.write("<h1>{{ Title }}</h1>")
+
+    def tearDown(self):
+        shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+    def test_cached_between_calls(self):
+        self.assertIs(load_template(self.path), load_template(self.path))
+
+    def test_cache_per_basepath(self):
+        self.assertIsNot(load_template(self.path, "/"), load_template(self.path, "/blog/"))
+
+    def test_reloaded_when_file_changes(self):
+        first = load_template(self.path)
+        with open(self.path, "w") as f:
+            f.write("<h2>{{ Title }}</h2>!")
+        second = load_template(self.path)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({"Title": "x"}), "<h2>x</h2>!")
+
+if __name__ == "__main__":
+    unittest.main()
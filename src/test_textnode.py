@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import HTML_BUILDERS, TextNode, TextType, text_node_to_html_node
 
 
 class TestTextNode(unittest.TestCase):
@@ -92,6 +92,17 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "Click here")
         self.assertEqual(html_node.props, {"href": "https://example.com"})
 
+    def test_link_basepath(self):
+        """Tests that root-relative link and image URLs are moved below the basepath."""
+        link = text_node_to_html_node(TextNode("About", TextType.LINK, "/about"), "/base/")
+        self.assertEqual(link.props, {"href": "/base/about"})
+        image = text_node_to_html_node(TextNode("Logo", TextType.IMAGE, "/logo.png"), "/base/")
+        self.assertEqual(image.props, {"src": "/base/logo.png", "alt": "Logo"})
+        absolute = text_node_to_html_node(TextNode("Out", TextType.LINK, "https://example.com/"), "/base/")
+        self.assertEqual(absolute.props, {"href": "https://example.com/"})
+        code = text_node_to_html_node(TextNode('href="/a"', TextType.CODE), "/base/")
+        self.assertEqual(code.value, 'href="/a"')
+
     def test_link_missing_url(self):
         """Tests LINK TextNode with no URL, expecting an error."""
         node = TextNode("Click here", TextType.LINK)
@@ -131,6 +142,18 @@ class TestTextNode(unittest.TestCase):
             text_node_to_html_node(node)
         self.assertEqual(str(context.exception), "Text types need text")
 
+    def test_every_text_type_has_builder(self):
+        self.assertEqual(set(HTML_BUILDERS), set(TextType))
+
+    def test_empty_bold_raises_error(self):
+        """Tests that formatted text still can't be empty."""
+        with self.assertRaises(ValueError):
+            text_node_to_html_node(TextNode("", TextType.BOLD))
+
+    def test_no_instance_dict(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 
 
 if __name__ == "__main__":
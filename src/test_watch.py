@@ -0,0 +1,115 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import NamedTuple
+from unittest import mock
+
+import watch
+from watch import Watcher, diff, scan
+
+TEST_ROOT = Path(__file__).parent / "test_watch_data"
+
+class FakeEvent(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+class FakeINotify:
+    """Stands in for inotify_simple.INotify: records watches, replays queued events."""
+    def __init__(self):
+        self.watches = {}
+        self.events = []
+
+    def add_watch(self, path, mask):
+        return self.watches.setdefault(os.path.normpath(path), len(self.watches) + 1)
+
+    def read(self, timeout=None):
+        events, self.events = self.events, []
+        return events
+
+FAKE_FLAGS = SimpleNamespace(CREATE=1, DELETE=2, MODIFY=4, CLOSE_WRITE=8, MOVED_FROM=16, MOVED_TO=32)
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_ROOT / "nested", exist_ok=True)
+        self.page = TEST_ROOT / "nested" / "index.md"
+        with open(self.page, "w") as f:
+            f.write("# Page")
+
+    def tearDown(self):
+        shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+    def touch(self, path: Path, text: str) -> None:
+        with open(path, "w") as f:
+            f.write(text)
+        # Make sure the change is visible even on coarse mtime filesystems
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+
+    def test_scan_finds_nested_files(self):
+        snapshot = scan([str(TEST_ROOT)])
+        self.assertIn(str(self.page), snapshot)
+
+    def test_scan_skips_hidden_files(self):
+        self.touch(TEST_ROOT / ".index.md.swp", "swap")
+        self.assertNotIn(str(TEST_ROOT / ".index.md.swp"), scan([str(TEST_ROOT)]))
+
+    def test_scan_single_file(self):
+        self.assertEqual(list(scan([str(self.page)])), [str(self.page)])
+
+    def test_diff(self):
+        old = {"a": (1, 1), "b": (1, 1)}
+        new = {"a": (2, 1), "c": (1, 1)}
+        self.assertEqual(diff(old, new), ({"a", "c"}, {"b"}))
+
+    def test_poll_reports_changes_once(self):
+        watcher = Watcher([str(TEST_ROOT)])
+        self.assertEqual(watcher.poll(), (set(), set()))
+        self.touch(self.page, "# Changed")
+        self.assertEqual(watcher.poll(), ({str(self.page)}, set()))
+        self.assertEqual(watcher.poll(), (set(), set()))
+
+    def test_wait_for_changes_batches_events(self):
+        watcher = Watcher([str(TEST_ROOT)], interval=0.01, debounce=0.05)
+        other = TEST_ROOT / "other.md"
+
+        def edit():
+            self.touch(self.page, "# Changed")
+            self.touch(other, "# New")
+            os.remove(other)
+            self.touch(TEST_ROOT / "new.md", "# New")
+
+        threading.Timer(0.02, edit).start()
+        changed, removed = watcher.wait_for_changes()
+        self.assertEqual(changed, {str(self.page), str(TEST_ROOT / "new.md")})
+        self.assertEqual(removed, set())
+
+    @mock.patch.object(watch, "flags", FAKE_FLAGS, create=True)
+    @mock.patch.object(watch, "INotify", FakeINotify)
+    def test_single_file_watches_only_its_directory(self):
+        os.makedirs(TEST_ROOT / "content" / "blog", exist_ok=True)
+        os.makedirs(TEST_ROOT / "docs" / "blog", exist_ok=True)
+        template = TEST_ROOT / "template.html"
+        self.touch(template, "<html></html>")
+        watcher = Watcher([str(TEST_ROOT / "content"), str(template)])
+        watched = set(watcher.inotify.watches)
+        self.assertEqual(watched, {str(TEST_ROOT / "content"), str(TEST_ROOT / "content" / "blog"), str(TEST_ROOT)})
+
+        root_wd = watcher.inotify.watches[str(TEST_ROOT)]
+        content_wd = watcher.inotify.watches[str(TEST_ROOT / "content")]
+        self.assertFalse(watcher._relevant(FakeEvent(root_wd, 8, 0, "docs")))
+        self.assertTrue(watcher._relevant(FakeEvent(root_wd, 8, 0, "template.html")))
+        self.assertTrue(watcher._relevant(FakeEvent(content_wd, 8, 0, "index.md")))
+
+        # Output written next to the template doesn't end the wait early
+        watcher.inotify.events = [FakeEvent(root_wd, 8, 0, "docs")]
+        started = time.monotonic()
+        watcher._wait(0.05)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+if __name__ == "__main__":
+    unittest.main()
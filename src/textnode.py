@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Self
+from typing import Callable, Dict, Self
 from leafnode import LeafNode
 
 class TextType(Enum):
@@ -11,6 +11,8 @@ class TextType(Enum):
     IMAGE = "image"
         
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -22,25 +24,46 @@ class TextNode:
     def __repr__(self):
         return f"TextNode(`{self.text}`, {self.text_type.value}, {self.url})"
     
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
-    match (text_node.text_type):
-        case TextType.TEXT:
-            if not text_node.text:
-                raise TypeError("Text types need text")
-            return LeafNode(None, text_node.text)
-        case TextType.BOLD:
-            return LeafNode("b", text_node.text)
-        case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
-        case TextType.CODE:
-            return LeafNode("code", text_node.text)
-        case TextType.LINK:
-            if not text_node.url:
-                raise TypeError("Links need an URL")
-            return LeafNode("a", text_node.text, {"href": text_node.url})
-        case TextType.IMAGE:
-            if not text_node.url:
-                raise TypeError("Images need an URL")
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-        case _:
-            raise TypeError("unknown text type")
+def with_basepath(url: str, basepath: str) -> str:
+    # Root-relative URLs have to point below the deployment basepath
+    if basepath != "/" and url.startswith("/"):
+        return basepath + url[1:]
+    return url
+
+# One builder per text type, looked up instead of matched for every inline node.
+# The nodes they build are well-formed by construction, so they skip LeafNode's
+# validation and only keep the checks a malformed TextNode can actually trip.
+def _text_to_html(text_node: TextNode, basepath: str = "/") -> LeafNode:
+    if not text_node.text:
+        raise TypeError("Text types need text")
+    return LeafNode.trusted(None, text_node.text)
+
+def _tag_builder(tag: str) -> Callable[[TextNode, str], LeafNode]:
+    def build(text_node: TextNode, basepath: str = "/") -> LeafNode:
+        return LeafNode.trusted(tag, text_node.text)
+    return build
+
+def _link_to_html(text_node: TextNode, basepath: str = "/") -> LeafNode:
+    if not text_node.url:
+        raise TypeError("Links need an URL")
+    return LeafNode.trusted("a", text_node.text, {"href": with_basepath(text_node.url, basepath)})
+
+def _image_to_html(text_node: TextNode, basepath: str = "/") -> LeafNode:
+    if not text_node.url:
+        raise TypeError("Images need an URL")
+    return LeafNode.trusted("img", "", {"src": with_basepath(text_node.url, basepath), "alt": text_node.text})
+
+HTML_BUILDERS: Dict[TextType, Callable[[TextNode, str], LeafNode]] = {
+    TextType.TEXT: _text_to_html,
+    TextType.BOLD: _tag_builder("b"),
+    TextType.ITALIC: _tag_builder("i"),
+    TextType.CODE: _tag_builder("code"),
+    TextType.LINK: _link_to_html,
+    TextType.IMAGE: _image_to_html,
+}
+
+def text_node_to_html_node(text_node: TextNode, basepath: str = "/") -> LeafNode:
+    build = HTML_BUILDERS.get(text_node.text_type)
+    if build is None:
+        raise TypeError("unknown text type")
+    return build(text_node, basepath)
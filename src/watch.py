@@ -0,0 +1,133 @@
+import os
+import time
+from typing import Dict, List
+
+try:
+    # Optional: lets us sleep until the kernel reports a change instead of polling
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# (mtime_ns, size) per file; enough to notice edits without reading contents
+Snapshot = Dict[str, tuple[int, int]]
+
+def scan(paths: List[str]) -> Snapshot:
+    snapshot = {}
+    for path in paths:
+        if os.path.isdir(path):
+            _scan_dir(path, snapshot)
+        elif os.path.exists(path):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+def _scan_dir(directory: str, snapshot: Snapshot) -> None:
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            # Skip editor swap files and other hidden clutter
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    _scan_dir(entry.path, snapshot)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                # Deleted between listing and stat; the next scan will notice
+                continue
+
+def diff(old: Snapshot, new: Snapshot) -> tuple[set, set]:
+    changed = {path for path, version in new.items() if old.get(path) != version}
+    removed = {path for path in old if path not in new}
+    return changed, removed
+
+class Watcher:
+    """
+    Watches files and directory trees and hands out batches of changes.
+    A batch is only returned once the watched paths have been quiet for
+    `debounce` seconds, so a save that touches several files (or an editor
+    writing in several steps) becomes a single rebuild.
+    """
+    def __init__(self, paths: List[str], interval: float = 0.05, debounce: float = 0.05):
+        self.paths = paths
+        self.interval = interval
+        self.debounce = debounce
+        self.snapshot = scan(paths)
+        self.inotify = None
+        # Watch descriptor -> names of the single files watched through that directory
+        self.file_watches: Dict[int, set] = {}
+        if INotify is not None:
+            self.inotify = INotify()
+            self._add_watches()
+
+    def _add_watches(self) -> None:
+        mask = flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_FROM | flags.MOVED_TO
+        tree_watches = set()
+        for path in self.paths:
+            if not os.path.isdir(path):
+                continue
+            for directory, _, _ in os.walk(path):
+                try:
+                    tree_watches.add(self.inotify.add_watch(directory, mask))
+                except OSError:
+                    continue
+        for path in self.paths:
+            if os.path.isdir(path):
+                continue
+            # Watch the parent so replace-on-save editors are still seen, but
+            # only that directory: it may well hold the output and the rest of
+            # the project, whose writes shouldn't wake us up
+            directory, name = os.path.split(path)
+            try:
+                wd = self.inotify.add_watch(directory or ".", mask)
+            except OSError:
+                continue
+            if wd not in tree_watches:
+                self.file_watches.setdefault(wd, set()).add(name)
+
+    def _relevant(self, event) -> bool:
+        names = self.file_watches.get(event.wd)
+        return names is None or event.name in names
+
+    def _wait(self, timeout: float) -> None:
+        if self.inotify is None:
+            time.sleep(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            if any(self._relevant(event) for event in self.inotify.read(timeout=max(1, int(remaining * 1000)))):
+                # New directories need watches of their own; re-adding existing ones is harmless
+                self._add_watches()
+                return
+
+    def poll(self) -> tuple[set, set]:
+        # Changes since the last poll, without waiting
+        current = scan(self.paths)
+        changed, removed = diff(self.snapshot, current)
+        self.snapshot = current
+        return changed, removed
+
+    def wait_for_changes(self) -> tuple[set, set]:
+        # Diff against the state before the batch, so a file that is created
+        # and deleted again within one batch doesn't show up at all
+        baseline = self.snapshot
+        pending = False
+        while True:
+            batch_changed, batch_removed = self.poll()
+            if batch_changed or batch_removed:
+                pending = True
+                self._wait(self.debounce)
+            elif pending:
+                changed, removed = diff(baseline, self.snapshot)
+                if changed or removed:
+                    return changed, removed
+                pending = False
+            else:
+                # With inotify the read wakes us up on the first event, so idle
+                # waits can be long; the rescan afterwards stays the source of truth.
+                self._wait(self.interval if self.inotify is None else 1.0)